@@ -0,0 +1,441 @@
+"""
+End-to-end load test for PyTaskFlow.
+
+Starts the scheduler (uvicorn), the coordinator and N workers as separate
+processes against a throwaway SQLite database (or any DATABASE_URL), submits
+a configurable task mix through the REST API and waits for every task to
+finish. Results are printed and written as JSON so runs can be compared.
+
+Usage:
+    python -m benchmarks.load_test --workers 4 --tasks 2000 \\
+        --mix noop=60,sleep=20,cpu=10,chatty=10 --output run.json
+    python -m benchmarks.load_test --compare baseline.json run.json
+
+The SQLite stand-in needs `aiosqlite` installed.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Command per task kind; "{py}" is the current interpreter
+TASK_KINDS = {
+    "noop": "true",
+    "sleep": "sleep {sleep}",
+    "cpu": "{py} -c \"sum(i * i for i in range(2_000_000))\"",
+    "chatty": "{py} -c \"[print('line', i) for i in range(20000)]\"",
+}
+
+TERMINAL_STATES = ("done", "failed")
+
+
+# ======================================================
+#  Process management
+# ======================================================
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, proc, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"service for port {port} exited with code {proc.returncode}")
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise RuntimeError(f"service on port {port} did not come up in {timeout}s")
+
+
+class Cluster:
+    """Scheduler + coordinator(s) + N workers, each in its own process."""
+
+    def __init__(self, workdir: str, db_url: str, workers: int, check_interval: float,
+                 mode: str = "push", coordinators: int = 1, worker_resources: str = ""):
+        self.workdir = workdir
+        self.db_url = db_url
+        self.api_port = free_port()
+        self.heartbeat_ports = [free_port() for _ in range(coordinators)]
+        self.worker_ports = [free_port() for _ in range(workers)]
+        self.check_interval = check_interval
+        self.mode = mode
+        self.worker_resources = worker_resources
+        self.procs = []
+
+    def _env(self, name: str, **extra):
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": ROOT,
+            "PYTHONUNBUFFERED": "1",
+            "DATABASE_URL": self.db_url,
+            "DB_STATS_FILE": os.path.join(self.workdir, f"dbstats-{name}.json"),
+            "RATE_LIMIT_ENABLED": "false",
+            "CHECK_INTERVAL": str(self.check_interval),
+            "COORDINATOR_HOST": "127.0.0.1",
+            "COORDINATOR_HEARTBEAT_PORT": str(self.heartbeat_ports[0]),
+            "WORKER_HEARTBEAT_INTERVAL": "2",
+            "DISPATCH_MODE": self.mode,
+            "WORKER_RESOURCES": self.worker_resources,
+        })
+        env.update({k: str(v) for k, v in extra.items()})
+        return env
+
+    def _spawn(self, name: str, args, **env):
+        log = open(os.path.join(self.workdir, f"{name}.log"), "w")
+        proc = subprocess.Popen(args, cwd=ROOT, env=self._env(name, **env), stdout=log, stderr=subprocess.STDOUT)
+        self.procs.append((name, proc, log))
+        return proc
+
+    def start(self):
+        scheduler = self._spawn(
+            "scheduler",
+            [sys.executable, "-m", "uvicorn", "scheduler.main:app",
+             "--host", "127.0.0.1", "--port", str(self.api_port), "--log-level", "warning"],
+        )
+        wait_for_port(self.api_port, scheduler)
+
+        if self.mode == "pull":
+            # Workers dial in; they have no port of their own to wait for
+            self._start_coordinators()
+            for i in range(len(self.worker_ports)):
+                self._spawn(
+                    f"worker-{i}", [sys.executable, "-m", "worker.main"], WORKER_NAME=f"bench-{i}",
+                    COORDINATOR_HEARTBEAT_PORT=self._coordinator_port(i),
+                )
+            return
+
+        workers = [
+            self._spawn(
+                f"worker-{i}", [sys.executable, "-m", "worker.main"],
+                WORKER_GRPC_PORT=port, WORKER_NAME=f"bench-{i}",
+                WORKER_ADVERTISE_ADDRESS=f"127.0.0.1:{port}",
+                COORDINATOR_HEARTBEAT_PORT=self._coordinator_port(i),
+            )
+            for i, port in enumerate(self.worker_ports)
+        ]
+        for port, proc in zip(self.worker_ports, workers):
+            wait_for_port(port, proc)
+        self._start_coordinators(
+            WORKER_ENDPOINTS=",".join(f"127.0.0.1:{p}" for p in self.worker_ports),
+        )
+
+    def _coordinator_port(self, worker_index: int) -> int:
+        return self.heartbeat_ports[worker_index % len(self.heartbeat_ports)]
+
+    def _start_coordinators(self, **env):
+        sharded = len(self.heartbeat_ports) > 1
+        for i, port in enumerate(self.heartbeat_ports):
+            name = f"coordinator-{i}" if sharded else "coordinator"
+            if sharded:
+                env.update(SHARDING_ENABLED="1", COORDINATOR_SHARD_ID=name)
+            coordinator = self._spawn(
+                name, [sys.executable, "-m", "coordinator.main"], COORDINATOR_HEARTBEAT_PORT=port, **env
+            )
+            wait_for_port(port, coordinator)
+
+    def stop(self, timeout: float = 30.0):
+        # SIGTERM lets every service drain and flush its DB statistics
+        for _, proc, _ in self.procs:
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+        for name, proc, log in self.procs:
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                print(f"{name} did not stop in {timeout}s; killing it", file=sys.stderr)
+                proc.kill()
+            log.close()
+
+    def db_stats(self):
+        total = {"statements": 0, "commits": 0}
+        for name, _, _ in self.procs:
+            path = os.path.join(self.workdir, f"dbstats-{name}.json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    for key, value in json.load(f).items():
+                        total[key] = total.get(key, 0) + value
+        return total
+
+
+# ======================================================
+#  Workload
+# ======================================================
+def parse_mix(spec: str):
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in TASK_KINDS:
+            raise SystemExit(f"unknown task kind {kind!r}; choose from {', '.join(TASK_KINDS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def build_commands(mix, total: int, sleep: float):
+    """Deterministic interleaving of the mix (no RNG: runs stay comparable)."""
+    weights = sum(mix.values())
+    counts = {k: int(total * w / weights) for k, w in mix.items()}
+    first = next(iter(counts))
+    counts[first] += total - sum(counts.values())
+
+    commands = []
+    remaining = dict(counts)
+    while len(commands) < total:
+        for kind in mix:
+            if remaining[kind]:
+                remaining[kind] -= 1
+                commands.append((kind, TASK_KINDS[kind].format(py=sys.executable, sleep=sleep)))
+    return commands, counts
+
+
+def submit_all(api_port: int, commands, concurrency: int):
+    url = f"http://127.0.0.1:{api_port}/api/schedule"
+
+    def submit(command):
+        body = json.dumps({
+            "command": command,
+            "scheduled_at": datetime.now(timezone.utc).isoformat(),
+        }).encode()
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return json.load(resp)["id"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ids = list(pool.map(submit, [c for _, c in commands]))
+    return ids, time.perf_counter() - started
+
+
+# ======================================================
+#  Measurement
+# ======================================================
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+
+    def pick(q):
+        return round(values[min(len(values) - 1, int(q * len(values)))], 4)
+
+    return {
+        "p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99),
+        "max": round(values[-1], 4), "mean": round(sum(values) / len(values), 4),
+    }
+
+
+def _seconds(later, earlier):
+    if later is None or earlier is None:
+        return None
+    return (later - earlier).total_seconds()
+
+
+def wait_for_completion(session_factory, ids, timeout: float):
+    """Poll the DB (cheap COUNT) until every submitted task is terminal."""
+    import asyncio
+    from sqlalchemy import func, select
+    from scheduler.models import Task
+
+    async def count_terminal():
+        async with session_factory() as session:
+            result = await session.execute(
+                select(func.count()).select_from(Task)
+                .where(Task.id.in_(ids), Task.status.in_(TERMINAL_STATES))
+            )
+            return result.scalar_one()
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        finished = asyncio.run(count_terminal())
+        if finished >= len(ids):
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def collect(session_factory, ids):
+    import asyncio
+    from sqlalchemy import select
+    from scheduler.models import Task
+
+    async def load():
+        async with session_factory() as session:
+            result = await session.execute(select(Task).where(Task.id.in_(ids)))
+            return result.scalars().all()
+
+    tasks = asyncio.run(load())
+    dispatch, start, e2e, finished_at = [], [], [], []
+    by_status = {}
+    for t in tasks:
+        by_status[t.status] = by_status.get(t.status, 0) + 1
+        ready = max(t.created_at, t.scheduled_at)
+        end = t.completed_at or t.failed_at
+        for bucket, value in (
+            (dispatch, _seconds(t.picked_at, ready)),
+            (start, _seconds(t.started_at, t.picked_at)),
+            (e2e, _seconds(end, t.created_at)),
+        ):
+            if value is not None:
+                bucket.append(value)
+        if end is not None:
+            finished_at.append(end)
+
+    first_created = min(t.created_at for t in tasks)
+    span = _seconds(max(finished_at), first_created) if finished_at else None
+    return {
+        "tasks_by_status": by_status,
+        "dispatch_latency_s": percentiles(dispatch),
+        "start_latency_s": percentiles(start),
+        "end_to_end_s": percentiles(e2e),
+        "completion_throughput_per_s": round(len(finished_at) / span, 2) if span else None,
+    }
+
+
+# ======================================================
+#  Comparison
+# ======================================================
+COMPARE_KEYS = [
+    ("ingest_rate_per_s", True),
+    ("completion_throughput_per_s", True),
+    ("dispatch_latency_s.p50", False),
+    ("dispatch_latency_s.p99", False),
+    ("end_to_end_s.p50", False),
+    ("end_to_end_s.p99", False),
+    ("db_round_trips_per_task", False),
+]
+
+
+def _lookup(data, dotted):
+    for part in dotted.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def compare(baseline_path: str, current_path: str):
+    with open(baseline_path) as f:
+        base = json.load(f)
+    with open(current_path) as f:
+        cur = json.load(f)
+
+    print(f"{'metric':34} {'baseline':>12} {'current':>12} {'change':>9}")
+    for key, higher_is_better in COMPARE_KEYS:
+        b, c = _lookup(base, key), _lookup(cur, key)
+        if b is None or c is None:
+            print(f"{key:34} {str(b):>12} {str(c):>12}")
+            continue
+        change = (c - b) / b * 100 if b else 0.0
+        better = change >= 0 if higher_is_better else change <= 0
+        print(f"{key:34} {b:>12.4g} {c:>12.4g} {change:>+8.1f}% {'✅' if better else '⚠️'}")
+
+
+# ======================================================
+#  Entry point
+# ======================================================
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="pytaskflow-bench-")
+    db_url = args.db_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    # Create the schema from this process before any service starts.
+    # NullPool: every asyncio.run() below gets fresh connections on its own loop.
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+    from scheduler.services.db import Base
+    import scheduler.models  # noqa: F401  (register tables)
+
+    engine = create_async_engine(db_url, poolclass=NullPool)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_schema())
+
+    mix = parse_mix(args.mix)
+    commands, counts = build_commands(mix, args.tasks, args.sleep)
+
+    cluster = Cluster(workdir, db_url, args.workers, args.check_interval, args.mode, args.coordinators,
+                      args.worker_resources)
+    print(f"🚀 Starting scheduler, coordinator and {args.workers} worker(s) (logs: {workdir})")
+    cluster.start()
+    try:
+        print(f"📦 Submitting {len(commands)} task(s): {counts}")
+        ids, ingest_seconds = submit_all(cluster.api_port, commands, args.concurrency)
+
+        print("⏳ Waiting for completion...")
+        completed = wait_for_completion(session_factory, ids, args.timeout)
+    finally:
+        cluster.stop()
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "workers": args.workers, "tasks": args.tasks, "mix": counts,
+            "sleep": args.sleep, "concurrency": args.concurrency,
+            "check_interval": args.check_interval, "mode": args.mode,
+            "coordinators": args.coordinators, "worker_resources": args.worker_resources,
+            "database": db_url.split("://", 1)[0],
+        },
+        "completed_before_timeout": completed,
+        "ingest_seconds": round(ingest_seconds, 3),
+        "ingest_rate_per_s": round(len(ids) / ingest_seconds, 2),
+    }
+    results.update(collect(session_factory, ids))
+
+    db = cluster.db_stats()
+    results["db"] = db
+    results["db_round_trips_per_task"] = round((db["statements"] + db["commits"]) / len(ids), 2)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+    return 0 if completed else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--mix", default="noop=70,sleep=10,cpu=10,chatty=10",
+                        help="comma-separated kind=weight; kinds: " + ", ".join(TASK_KINDS))
+    parser.add_argument("--sleep", type=float, default=0.2, help="seconds for 'sleep' tasks")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel submit requests")
+    parser.add_argument("--check-interval", type=float, default=0.2, help="coordinator poll interval")
+    parser.add_argument("--mode", choices=("push", "pull"), default="push",
+                        help="DISPATCH_MODE for coordinator and workers")
+    parser.add_argument("--coordinators", type=int, default=1,
+                        help="coordinator shards (SHARDING_ENABLED when > 1)")
+    parser.add_argument("--worker-resources", default="cpu=3",
+                        help="WORKER_RESOURCES for every worker ('' = detect); default matches the old 3 slots")
+    parser.add_argument("--db-url", help="defaults to a fresh SQLite file in a temp dir")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for completion")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two results files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Cold-start benchmark for PyTaskFlow services.
+
+Measures, in fresh interpreters:
+  * import time of each service entry module (worker, coordinator, scheduler)
+  * worker time-to-ready: process spawn until its gRPC port accepts
+    connections, i.e. until it can take tasks (push mode)
+
+Autoscaled worker pods add capacity only once they are ready, so the worker
+number is the one to watch; --target fails the run when its median is above it.
+
+Usage:
+    python -m benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.load_test import ROOT, free_port, wait_for_port
+
+MODULES = ("worker.main", "coordinator.main", "scheduler.main")
+
+_IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _env(workdir: str, **extra):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": ROOT,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(workdir, 'startup.db')}",
+        "COORDINATOR_HOST": "127.0.0.1",
+        "COORDINATOR_HEARTBEAT_PORT": str(free_port()),   # nothing listens; heartbeats just warn
+    })
+    env.update({k: str(v) for k, v in extra.items()})
+    return env
+
+
+def time_import(module: str, workdir: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET.format(module=module)],
+        cwd=ROOT, env=_env(workdir), capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_worker_ready(workdir: str) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "worker.main"], cwd=ROOT,
+        env=_env(workdir, WORKER_GRPC_PORT=port, DISPATCH_MODE="push"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port, proc)
+        return time.perf_counter() - started
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _summary(samples):
+    return {
+        "median": round(statistics.median(samples), 4),
+        "min": round(min(samples), 4),
+        "max": round(max(samples), 4),
+    }
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="pytaskflow-startup-")
+    results = {"runs": args.runs, "import_s": {}, "worker_ready_s": None}
+
+    for module in MODULES:
+        samples = [time_import(module, workdir) for _ in range(args.runs)]
+        results["import_s"][module] = _summary(samples)
+        print(f"📦 import {module:18} median {results['import_s'][module]['median'] * 1000:7.1f} ms")
+
+    samples = [time_worker_ready(workdir) for _ in range(args.runs)]
+    results["worker_ready_s"] = _summary(samples)
+    ready = results["worker_ready_s"]["median"]
+    print(f"🚀 worker ready (spawn → port open) median {ready * 1000:7.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    if args.target and ready > args.target:
+        print(f"⚠️ Worker ready time {ready:.3f}s is above the {args.target}s target.")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--target", type=float, default=1.0,
+                        help="seconds; exit 1 when the worker's median ready time is above (0 = off)")
+    parser.add_argument("--output", help="write results JSON here")
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
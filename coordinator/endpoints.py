@@ -0,0 +1,331 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from utils import grpc_options
+from scheduler.core.resources import Resources
+
+# Shares the handler configured by coordinator.main
+logger = logging.getLogger("Coordinator")
+
+# Circuit breaker tuning
+BREAKER_CONSECUTIVE_FAILURES = int(os.getenv("BREAKER_CONSECUTIVE_FAILURES", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))   # open above this ratio...
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))              # ...of the last N calls
+BREAKER_MIN_CALLS = 10                                               # before the ratio counts
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "15"))        # seconds open → half-open
+
+# A draining worker gets a single probe task after this many seconds without
+# a heartbeat confirming the drain; a normal reply puts it back in rotation.
+DRAIN_RECHECK = float(os.getenv("WORKER_DRAIN_RECHECK", "30"))
+# Seconds a worker address lookup (hit or miss) is reused; pods move
+RESOLVE_TTL = float(os.getenv("WORKER_RESOLVE_TTL", "60"))
+
+# Adaptive (AIMD) concurrency tuning
+CONCURRENCY_INITIAL = int(os.getenv("WORKER_CONCURRENCY_INITIAL", "3"))
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = int(os.getenv("WORKER_CONCURRENCY_MAX", "64"))
+CONCURRENCY_BACKOFF = 0.5                                            # multiplicative decrease
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class NoWorkerAvailable(Exception):
+    """Every known worker endpoint is open or at its concurrency limit."""
+
+
+class WorkerUnreachable(Exception):
+    """The chosen worker's channel did not connect within DISPATCH_TIMEOUT."""
+
+
+# ===============================
+#  Circuit Breaker
+# ===============================
+class CircuitBreaker:
+    """
+    closed     → calls flow; too many failures trips it open
+    open       → no calls until the cooldown has passed
+    half_open  → a single probe call decides: success closes, failure re-opens
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.outcomes = []      # recent results, True = success
+
+    def current_state(self) -> str:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= BREAKER_COOLDOWN:
+            self._transition(HALF_OPEN)
+        return self.state
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._remember(True)
+        # A late success from before the circuit opened doesn't close it
+        if self.state == HALF_OPEN:
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._remember(False)
+        if self.state == HALF_OPEN or self._tripped():
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def _remember(self, ok: bool):
+        self.outcomes.append(ok)
+        if len(self.outcomes) > BREAKER_WINDOW:
+            del self.outcomes[0]
+
+    def _tripped(self) -> bool:
+        if self.consecutive_failures >= BREAKER_CONSECUTIVE_FAILURES:
+            return True
+        if len(self.outcomes) >= BREAKER_MIN_CALLS:
+            errors = self.outcomes.count(False) / len(self.outcomes)
+            return errors > BREAKER_ERROR_RATE
+        return False
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        if state == CLOSED:
+            self.outcomes.clear()
+            logger.info(f"🟢 Worker {self.name} circuit closed.")
+        elif state == OPEN:
+            logger.warning(f"🔴 Worker {self.name} circuit opened; routing around it for {BREAKER_COOLDOWN}s.")
+        else:
+            logger.info(f"🟡 Worker {self.name} circuit half-open; sending a probe.")
+
+
+# ===============================
+#  AIMD Concurrency Limit
+# ===============================
+class AIMDLimit:
+    """
+    Additive-increase / multiplicative-decrease in-flight limit.
+    Grows by ~1 per `limit` successful calls; halves on an error. Call
+    latency is no signal here: ExecuteTask lasts as long as the task does.
+    """
+
+    def __init__(self):
+        self.limit = float(CONCURRENCY_INITIAL)
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def on_success(self):
+        self.limit = min(CONCURRENCY_MAX, self.limit + 1.0 / self.limit)
+
+    def on_failure(self):
+        self._decrease()
+
+    def _decrease(self):
+        self.limit = max(CONCURRENCY_MIN, self.limit * CONCURRENCY_BACKOFF)
+
+
+# ===============================
+#  Worker Endpoint + Pool
+# ===============================
+class WorkerEndpoint:
+    def __init__(self, address: str):
+        self.address = address
+        self.breaker = CircuitBreaker(address)
+        self.concurrency = AIMDLimit()
+        self.inflight = 0
+        self.draining = False     # set from heartbeats / "requeued" responses
+        self.draining_since = 0.0 # monotonic time the drain was last confirmed
+        self.capacity = None      # Resources from heartbeats; None = unknown, fits anything
+        self.held = []            # requests of the tasks dispatched here and not yet released
+        self._channel = None
+
+    @property
+    def channel(self):
+        # One long-lived channel per worker instead of one per dispatch
+        if self._channel is None:
+            self._channel = grpc_options.insecure_channel(self.address)
+        return self._channel
+
+    def free_slots(self, share: int = 1) -> int:
+        """Dispatch slots left; `share` coordinators split the concurrency limit."""
+        if self.draining:
+            if time.monotonic() - self.draining_since < DRAIN_RECHECK:
+                return 0
+            # Nothing has confirmed the drain for a while: probe with one task
+            return 1 if self.inflight == 0 else 0
+        state = self.breaker.current_state()
+        if state == OPEN:
+            return 0
+        limit = 1 if state == HALF_OPEN else max(1, self.concurrency.current // share)
+        return max(0, limit - self.inflight)
+
+    def fitted(self, need):
+        """`need` as this worker will reserve it (a default cpu capped at its cores)."""
+        return None if need is None else need.fitted(self.capacity)
+
+    @property
+    def reserved(self) -> Resources:
+        # Sized for the current capacity, which may have arrived after the dispatch
+        return sum((self.fitted(need) for need in self.held), Resources())
+
+    def available(self):
+        """Unreserved resources, or None while the capacity is unknown."""
+        return None if self.capacity is None else self.capacity - self.reserved
+
+    async def close(self):
+        if self._channel is not None:
+            await self._channel.close()
+            self._channel = None
+
+
+class EndpointPool:
+    """Chooses a healthy, least-loaded worker for every dispatch."""
+
+    def __init__(self, addresses):
+        self.endpoints = {a: WorkerEndpoint(a) for a in addresses}
+        # Coordinators dispatching to these same workers (sharding), each
+        # using 1/share of every worker's concurrency limit
+        self.share = 1
+
+    @classmethod
+    def from_env(cls):
+        addresses = os.getenv("WORKER_ENDPOINTS")
+        if addresses:
+            return cls([a.strip() for a in addresses.split(",") if a.strip()])
+        host = os.getenv("WORKER_HOST", "localhost")
+        port = os.getenv("WORKER_GRPC_PORT", "50051")
+        return cls([f"{host}:{port}"])
+
+    async def endpoint_for(self, address: str):
+        """
+        The endpoint a worker-reported address refers to: an exact match, else
+        one sharing a resolved IP and the port (e.g. a container hostname vs.
+        the service name in WORKER_ENDPOINTS).
+        """
+        ep = self.endpoints.get(address)
+        if ep is not None or not address:
+            return ep
+        key = await _resolve(address)
+        if key is None:
+            return None
+        for ep in self.endpoints.values():
+            other = await _resolve(ep.address)
+            if other is not None and other[1] == key[1] and other[0] & key[0]:
+                return ep
+        return None
+
+    def set_draining(self, address: str, draining: bool):
+        ep = self.endpoints.get(address)
+        if ep is None:
+            return
+        if draining:
+            ep.draining_since = time.monotonic()
+        if ep.draining == draining:
+            return
+        ep.draining = draining
+        if draining:
+            logger.warning(f"🛑 Worker {ep.address} is draining; no new tasks will be routed to it.")
+        else:
+            logger.info(f"🟢 Worker {ep.address} is accepting tasks again.")
+
+    def update_capacity(self, address: str, capacity: Resources):
+        ep = self.endpoints.get(address)
+        if ep is None or ep.capacity == capacity:
+            return
+        ep.capacity = capacity
+        logger.info(f"🧮 Worker {ep.address} capacity: {capacity.as_dict()}")
+
+    def set_share(self, shards: int):
+        if shards != self.share:
+            logger.info(f"🧩 Splitting worker concurrency limits across {shards} coordinator(s).")
+        self.share = shards
+
+    def capacity(self) -> int:
+        return sum(ep.free_slots(self.share) for ep in self.endpoints.values())
+
+    def acquire(self, need: Resources = None) -> WorkerEndpoint:
+        candidates = [
+            ep for ep in self.endpoints.values()
+            if ep.free_slots(self.share) > 0 and _fits(ep.fitted(need), ep.available())
+        ]
+        if not candidates:
+            raise NoWorkerAvailable("no healthy worker with free capacity")
+        ep = min(candidates, key=lambda e: _placement_key(e.fitted(need), e.available(), e))
+        ep.inflight += 1
+        if need is not None:
+            ep.held.append(need)
+        return ep
+
+    def planner(self):
+        """
+        Trial placement for one claim: returns accept(need) -> bool, which
+        packs requests into a snapshot of the current free slots/resources
+        without reserving anything.
+        """
+        free = [
+            [ep.free_slots(self.share), ep.available(), ep] for ep in self.endpoints.values()
+        ]
+
+        def accept(need: Resources) -> bool:
+            fits = [f for f in free if f[0] > 0 and _fits(f[2].fitted(need), f[1])]
+            if not fits:
+                return False
+            best = min(fits, key=lambda f: _placement_key(f[2].fitted(need), f[1], f[2]))
+            best[0] -= 1
+            if best[1] is not None:
+                best[1] = best[1] - best[2].fitted(need)
+            return True
+
+        return accept
+
+    def release(self, ep: WorkerEndpoint, ok: bool, need: Resources = None):
+        ep.inflight -= 1
+        if need is not None:
+            ep.held.remove(need)
+        if ok:
+            ep.breaker.record_success()
+            ep.concurrency.on_success()
+        else:
+            ep.breaker.record_failure()
+            ep.concurrency.on_failure()
+
+    async def close(self):
+        for ep in self.endpoints.values():
+            await ep.close()
+
+
+_resolved = {}   # "host:port" -> (expires, (frozenset of IPs, port) or None)
+
+
+async def _resolve(address: str):
+    """Resolve off the event loop; hits and misses are both cached for RESOLVE_TTL."""
+    cached = _resolved.get(address)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    host, _, port = address.rpartition(":")
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host.strip("[]"), port, type=socket.SOCK_STREAM,
+        )
+        key = (frozenset(info[4][0] for info in infos), port)
+    except OSError:
+        key = None
+    _resolved[address] = (time.monotonic() + RESOLVE_TTL, key)
+    return key
+
+
+def _fits(need, available) -> bool:
+    return need is None or available is None or need.fits_in(available)
+
+
+def _placement_key(need, available, ep: WorkerEndpoint):
+    """Best fit first (least left over, so big gaps stay free for big tasks), then least loaded."""
+    load = ep.inflight / max(1, ep.concurrency.current)
+    if need is None or available is None:
+        return (1.0, load)
+    return (need.leftover_score(available), load)
@@ -1,16 +1,28 @@
+from utils.config import load_env
+
+# .env first: the modules below read their knobs at import time
+load_env()
+
 import asyncio
+import random
+import signal
 import grpc
 from datetime import datetime, timezone, timedelta
+from sqlalchemy import update
 from sqlalchemy.future import select
 
-# from scheduler.services.db import AsyncSessionLocal
-
-from scheduler.services.db import AsyncSessionLocal
+from scheduler.services.db import AsyncSessionLocal, DIALECT, dispose_engine
 
 from scheduler.models import Task, Worker
+from scheduler.services.notify import publish_task_event, publish_worker_event
+from scheduler.core.retry import apply_failure, DISPATCH
+from scheduler.services.results import record_results
+from scheduler.core.resources import Resources
 
 # import task_pb2, task_pb2_grpc
 from proto import task_pb2, task_pb2_grpc
+from coordinator.endpoints import EndpointPool, NoWorkerAvailable, WorkerUnreachable
+from coordinator import sharding
 
 import sys, os
 
@@ -19,84 +31,349 @@ import sys, os
 
 # from utils.logger import setup_logger
 from utils.logger import setup_logger
+from utils.tracing import configure_tracing, start_span, record_span, CLIENT
+from utils.profiling import enable_profiling, monitor_event_loop, stage_timer
+from utils import grpc_options
 
 logger = setup_logger("Coordinator")
+configure_tracing("Coordinator")
+enable_profiling("Coordinator")
 
-CHECK_INTERVAL = 5          # seconds between polling cycles
-MAX_RETRIES = 3             # maximum retry attempts per task
-RETRY_DELAY = 60            # seconds before retry
-RETRY_BACKOFF = True        # exponential backoff toggle
+CHECK_INTERVAL = float(os.getenv("CHECK_INTERVAL", "5"))  # seconds between polling cycles
 HEARTBEAT_TIMEOUT = 30      # seconds after which worker marked as "dead"
+DRAIN_TIMEOUT = int(os.getenv("COORDINATOR_DRAIN_TIMEOUT", "30"))  # SIGTERM grace for dispatches
+
+# Task-level retries (attempts, delays, jitter) come from scheduler.core.retry:
+# TASK_MAX_RETRIES / RETRY_DELAY / RETRY_BACKOFF / RETRY_JITTER, or per task.
+
+DISPATCH_NETWORK_RETRIES = int(os.getenv("DISPATCH_NETWORK_RETRIES", "2"))
+DISPATCH_RETRY_BASE = 1.0   # seconds, first transient re-dispatch (full jitter)
+DISPATCH_RETRY_CAP = 10.0   # seconds, upper bound for transient re-dispatch
+MAX_INFLIGHT_DISPATCHES = int(os.getenv("MAX_INFLIGHT_DISPATCHES", "100"))
+# Seconds to wait for a worker's channel to connect. It deliberately doesn't
+# bound the call: ExecuteTask only returns once the command has finished.
+DISPATCH_TIMEOUT = float(os.getenv("DISPATCH_TIMEOUT", "0")) or None
+# >1: tasks claimed for the same worker in one cycle share an ExecuteTasks call.
+# The reply waits for the slowest task in it, so keep this for short tasks.
+DISPATCH_BATCH_SIZE = int(os.getenv("DISPATCH_BATCH_SIZE", "1"))
+# Bin packing looks this many times further down the queue than it can claim,
+# so a task that fits nowhere yet doesn't block smaller ones behind it.
+PLACEMENT_CANDIDATES = int(os.getenv("PLACEMENT_CANDIDATES", "4"))
+
+# "push": the coordinator calls ExecuteTask on WORKER_ENDPOINTS.
+# "pull": workers open a PullTasks stream here and ask for tasks with credit.
+DISPATCH_MODE = os.getenv("DISPATCH_MODE", "push").lower()
+
+# gRPC failures worth retrying on the network level. Not DEADLINE_EXCEEDED: an
+# accepted call that ran out of time may still be running on the worker, and
+# sending it again would run the task twice.
+TRANSIENT_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+}
+
+_inflight = set()       # asyncio.Tasks for dispatches in progress
+_redispatch = {}        # task_id -> TimerHandle for scheduled network retries
+_claim_lock = asyncio.Lock()   # pull streams and the poll loop never claim the same rows
+_shutting_down = False         # stops pull streams from claiming during shutdown
+worker_pool = EndpointPool.from_env()
+shard = sharding.ShardMembership() if sharding.ENABLED else None   # None: own every task
 
 
 # ===============================
 #  Task Dispatch Logic
 # ===============================
+def task_request(task, trace_parent: str = ""):
+    """TaskRequest for a claimed task; resources only when the task declared any."""
+    req = task_pb2.TaskRequest(id=task.id, command=task.command, trace_parent=trace_parent)
+    if task.resources:
+        req.resources.CopyFrom(task_pb2.Resources(**Resources.for_task(task.resources).request_fields()))
+    return req
+
+
+async def wait_connected(endpoint):
+    """Fail fast (transient) when the worker can't be reached within DISPATCH_TIMEOUT."""
+    if DISPATCH_TIMEOUT is None:
+        return
+    try:
+        await asyncio.wait_for(endpoint.channel.channel_ready(), DISPATCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise WorkerUnreachable(f"{endpoint.address} not reachable within {DISPATCH_TIMEOUT}s") from None
+
+
 async def dispatch_task(task):
-    """Send the task to a Worker via gRPC with transient retry."""
-    retries = 0
-    while retries < 2:  # internal retries for network issues
-        try:
-            worker_host = os.getenv("WORKER_HOST", "localhost")
-            worker_port = os.getenv("WORKER_GRPC_PORT", "50051")
+    """
+    Send the task to the best-fitting healthy Worker via gRPC (single attempt).
+    Raises on RPC errors or when no worker can take it right now.
+    """
+    need = Resources.for_task(task.resources)
+    endpoint = worker_pool.acquire(need)
+    ok = False
+    try:
+        await wait_connected(endpoint)
+        stub = task_pb2_grpc.WorkerServiceStub(endpoint.channel)
+        req = task_request(task)
+        with start_span(
+            "dispatch", parent=task.trace_parent, kind=CLIENT,
+            attributes={"task.id": task.id, "worker.address": endpoint.address},
+        ) as span, stage_timer("dispatch"):
+            # Trace context rides along in gRPC metadata
+            metadata = (("traceparent", span.traceparent),) if span.traceparent else None
+            resp = await stub.ExecuteTask(req, metadata=metadata)
+            span.set_attribute("task.status", resp.status)
+        ok = True
+        # "requeued": the worker handed it back because it is shutting down.
+        # Anything else (e.g. the probe of a draining worker) means it takes tasks.
+        worker_pool.set_draining(endpoint.address, resp.status == "requeued")
+        logger.info(
+            "✅ Task %s on %s: %s - %s", task.id, endpoint.address, resp.status, resp.message,
+            extra={"task_id": task.id},
+        )
+        return resp
+    finally:
+        worker_pool.release(endpoint, ok, need)
+
+
+async def dispatch_batch(endpoint, tasks):
+    """
+    Send several tasks to one Worker in a single ExecuteTasks call.
+    A slot on `endpoint` has already been acquired for every task.
+    """
+    sent_at = datetime.now(timezone.utc)
+    ok = False
+    try:
+        await wait_connected(endpoint)
+        stub = task_pb2_grpc.WorkerServiceStub(endpoint.channel)
+        req = task_pb2.TaskBatch(tasks=[task_request(t, t.trace_parent or "") for t in tasks])
+        with stage_timer("dispatch"):
+            # No deadline: the reply waits for the slowest task in the batch
+            resp = await stub.ExecuteTasks(req)
+        ok = True
+        if resp.results:
+            worker_pool.set_draining(endpoint.address, any(r.status == "requeued" for r in resp.results))
+        for result in resp.results:
+            logger.info(
+                "✅ Task %s on %s: %s - %s", result.id, endpoint.address, result.status, result.message,
+                extra={"task_id": result.id},
+            )
+        return resp
+    finally:
+        finished_at = datetime.now(timezone.utc)
+        for task in tasks:
+            worker_pool.release(endpoint, ok, Resources.for_task(task.resources))
+            record_span(
+                "dispatch", sent_at, finished_at, parent=task.trace_parent,
+                attributes={"task.id": task.id, "worker.address": endpoint.address, "batch.size": len(tasks)},
+            )
 
-            async with grpc.aio.insecure_channel(f"{worker_host}:{worker_port}") as channel:
 
-                stub = task_pb2_grpc.WorkerServiceStub(channel)
-                req = task_pb2.TaskRequest(id=task.id, command=task.command)
-                resp = await stub.ExecuteTask(req)
-                logger.info(f"✅ Task {task.id}: {resp.status} - {resp.message}")
-                return True
-        except Exception as e:
-            retries += 1
-            logger.warning(f"⚠️ gRPC dispatch attempt {retries}/2 failed for Task {task.id}: {e}")
-            await asyncio.sleep(2)
-    return False
+def _track(job):
+    _inflight.add(job)
+    job.add_done_callback(_inflight.discard)
+
+
+def start_dispatch(task, attempt: int = 0):
+    """Run a dispatch in the background so the polling loop never waits on it."""
+    _redispatch.pop(task.id, None)
+    _track(asyncio.create_task(_run_dispatch(task, attempt)))
+
+
+def start_batch_dispatch(tasks):
+    """Group tasks by worker and send each group as ExecuteTasks call(s) in the background."""
+    groups = {}
+    for task in tasks:
+        try:
+            endpoint = worker_pool.acquire(Resources.for_task(task.resources))
+        except NoWorkerAvailable:
+            start_dispatch(task)    # takes the usual transient-retry path
+            continue
+        groups.setdefault(endpoint, []).append(task)
+
+    for endpoint, group in groups.items():
+        for i in range(0, len(group), DISPATCH_BATCH_SIZE):
+            _track(asyncio.create_task(_run_batch(endpoint, group[i:i + DISPATCH_BATCH_SIZE])))
+
+
+def _classify(error: Exception):
+    """(transient, message) for a failed dispatch."""
+    if isinstance(error, grpc.aio.AioRpcError):
+        return error.code() in TRANSIENT_CODES, f"{error.code().name}: {error.details()}"
+    return isinstance(error, (NoWorkerAvailable, WorkerUnreachable)), str(error)
+
+
+async def _run_dispatch(task, attempt: int):
+    try:
+        await dispatch_task(task)
+    except Exception as e:
+        await _dispatch_failed(task, attempt, *_classify(e))
+
+
+async def _run_batch(endpoint, tasks):
+    try:
+        await dispatch_batch(endpoint, tasks)
+    except Exception as e:
+        transient, error = _classify(e)
+        for task in tasks:
+            await _dispatch_failed(task, 0, transient, error)
+
+
+async def _dispatch_failed(task, attempt: int, transient: bool, error: str):
+    if transient and attempt < DISPATCH_NETWORK_RETRIES:
+        # Schedule (don't sleep) the re-dispatch; jitter spreads recovery load
+        delay = random.uniform(0, min(DISPATCH_RETRY_CAP, DISPATCH_RETRY_BASE * (2 ** attempt)))
+        logger.warning(
+            f"⚠️ gRPC dispatch attempt {attempt + 1}/{DISPATCH_NETWORK_RETRIES + 1} failed "
+            f"for Task {task.id}: {error} (retrying in {delay:.1f}s)"
+        )
+        loop = asyncio.get_running_loop()
+        _redispatch[task.id] = loop.call_later(delay, start_dispatch, task, attempt + 1)
+        return
+
+    logger.warning("⚠️ Dispatch failed for Task %s: %s", task.id, error, extra={"task_id": task.id})
+    await record_dispatch_failure(task.id)
+
+
+async def record_dispatch_failure(task_id: int):
+    """Apply the task's retry policy after it could not be delivered."""
+    async with AsyncSessionLocal() as session:
+        task = await session.get(Task, task_id)
+        if task is None or task.status != "running":
+            return
+        delay = apply_failure(task, DISPATCH)
+        if delay is not None:
+            logger.warning(
+                "⏱️ Task %s will retry in %.1fs (count=%s).", task.id, delay, task.retry_count,
+                extra={"task_id": task.id},
+            )
+        else:
+            logger.error(
+                "❌ Task %s failed after %s attempt(s).", task.id, task.retry_count,
+                extra={"task_id": task.id},
+            )
+        await publish_task_event(session, task.id, task.status)
+        await session.commit()
+
+
+async def hand_back(task_ids):
+    """Put claimed-but-undelivered tasks back in the queue (no retry counted)."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(Task)
+            .where(Task.id.in_(task_ids), Task.status == "running")
+            .values(status="scheduled", picked_at=None, started_at=None)
+            .returning(Task.id)
+        )
+        for task_id in result.scalars().all():
+            await publish_task_event(session, task_id, "scheduled")
+        await session.commit()
+
+
+async def drain_dispatches():
+    """On shutdown: release pending re-dispatches and wait for in-flight ones."""
+    pending = list(_redispatch)
+    for handle in _redispatch.values():
+        handle.cancel()
+    _redispatch.clear()
+    if pending:
+        await hand_back(pending)
+        logger.info(f"↩️ Handed back {len(pending)} task(s) awaiting re-dispatch.")
+
+    if _inflight:
+        logger.info(f"⏳ Waiting up to {DRAIN_TIMEOUT}s for {len(_inflight)} in-flight dispatch(es).")
+        _, still_running = await asyncio.wait(set(_inflight), timeout=DRAIN_TIMEOUT)
+        # Cancelling the RPC makes the worker stop the command and hand the task back
+        for job in still_running:
+            job.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
 
 
 # ===============================
 #  Main Polling Loop
 # ===============================
+async def claim_due_tasks(limit: int, accept=None):
+    """
+    Mark up to `limit` due or retryable tasks as running and return them.
+    With `accept(need) -> bool` (a placement plan), due tasks it rejects
+    because they fit nowhere right now are left in the queue.
+    """
+    now = datetime.now(timezone.utc)
+    query = select(Task).where(
+        ((Task.status == "scheduled") & (Task.scheduled_at <= now))
+        | ((Task.status == "retrying") & (Task.retry_at <= now))
+    ).order_by(Task.scheduled_at).limit(limit if accept is None else limit * PLACEMENT_CANDIDATES)
+    if shard is not None:
+        buckets = shard.current_buckets()
+        if not buckets:
+            return []
+        if len(buckets) < sharding.BUCKETS:
+            query = query.where((Task.id % sharding.BUCKETS).in_(sorted(buckets)))
+    if DIALECT == "postgresql":
+        # Another claimer (e.g. a shard mid-rebalance) skips our rows instead of waiting
+        query = query.with_for_update(skip_locked=True)
+
+    async with _claim_lock:
+        with stage_timer("db.claim"):
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(query)
+                tasks = result.scalars().all()
+                if accept is not None:
+                    tasks = _place(tasks, limit, accept)
+
+                for task in tasks:
+                    task.status = "running"
+                    task.picked_at = now
+                    await publish_task_event(session, task.id, task.status)
+                await session.commit()
+
+    for task in tasks:
+        record_span(
+            "queue_wait", max(task.created_at, task.scheduled_at), task.picked_at,
+            parent=task.trace_parent, attributes={"task.id": task.id},
+        )
+    return tasks
+
+
+def _place(candidates, limit: int, accept):
+    placed = []
+    for task in candidates:
+        if len(placed) == limit:
+            break
+        if accept(Resources.for_task(task.resources)):
+            placed.append(task)
+    return placed
+
+
 async def poll_and_dispatch():
     """Continuously poll DB for due or retryable tasks and dispatch them."""
     logger.info("🔄 Coordinator polling loop started.")
 
     while True:
-        async with AsyncSessionLocal() as session:
-            now = datetime.now(timezone.utc)
-            result = await session.execute(
-                select(Task).where(
-                    ((Task.scheduled_at <= now) | (Task.retry_at <= now)),
-                    Task.status.in_(["scheduled", "retrying"])
-                )
-            )
-            tasks = result.scalars().all()
+        try:
+            if shard is not None:
+                # Every live shard dispatches to the same workers
+                worker_pool.set_share(shard.live_shards())
+            # Only claim what healthy workers can take; pending re-dispatches go first
+            capacity = min(
+                MAX_INFLIGHT_DISPATCHES - len(_inflight),
+                worker_pool.capacity(),
+            ) - len(_redispatch)
+            tasks = await claim_due_tasks(capacity, worker_pool.planner()) if capacity > 0 else []
 
             if tasks:
-                logger.info(f"📦 Found {len(tasks)} task(s) ready to dispatch.")
+                logger.info("📦 Found %s task(s) ready to dispatch.", len(tasks))
             else:
                 logger.debug("No due tasks this cycle.")
 
             for task in tasks:
-                task.status = "running"
-                task.picked_at = datetime.now(timezone.utc)
-                await session.commit()
-
-                logger.info(f"🚀 Dispatching Task {task.id}: {task.command}")
-                success = await dispatch_task(task)
-
-                if not success:
-                    task.retry_count += 1
-                    if task.retry_count < MAX_RETRIES:
-                        delay = RETRY_DELAY * (2 ** (task.retry_count - 1)) if RETRY_BACKOFF else RETRY_DELAY
-                        task.retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
-                        task.status = "retrying"
-                        logger.warning(f"⏱️ Task {task.id} will retry in {delay}s (count={task.retry_count}).")
-                    else:
-                        task.status = "failed"
-                        task.failed_at = datetime.now(timezone.utc)
-                        logger.error(f"❌ Task {task.id} reached max retries ({MAX_RETRIES}).")
-                    await session.commit()
+                logger.info("🚀 Dispatching Task %s: %s", task.id, task.command, extra={"task_id": task.id})
+            if DISPATCH_BATCH_SIZE > 1:
+                start_batch_dispatch(tasks)
+            else:
+                for task in tasks:
+                    start_dispatch(task)
+        except Exception as e:
+            # e.g. the database restarting: log it and try again next cycle
+            logger.error("❌ Polling cycle failed: %r", e)
 
         await asyncio.sleep(CHECK_INTERVAL)
 
@@ -108,50 +385,198 @@ class HeartbeatService(task_pb2_grpc.WorkerServiceServicer):
     async def Heartbeat(self, request, context):
         """Handle incoming worker heartbeat."""
         hostname = request.hostname
+        status = request.status or "alive"
+        address = request.address or None
+        capacity = Resources.from_proto(request.capacity) if request.HasField("capacity") else None
         async with AsyncSessionLocal() as session:
             result = await session.execute(select(Worker).where(Worker.hostname == hostname))
             worker = result.scalars().first()
             if worker:
                 worker.last_heartbeat = datetime.now(timezone.utc)
-                worker.status = "alive"
+                worker.address = address
+                worker.capacity = capacity.as_dict() if capacity else None
+                if worker.status != status:
+                    worker.status = status
+                    await publish_worker_event(session, hostname, worker.status)
             else:
                 worker = Worker(
                     hostname=hostname,
-                    status="alive",
+                    address=address,
+                    capacity=capacity.as_dict() if capacity else None,
+                    status=status,
                     last_heartbeat=datetime.now(timezone.utc)
                 )
                 session.add(worker)
+                await publish_worker_event(session, hostname, worker.status)
             await session.commit()
-        logger.info(f"💚 Heartbeat received from {hostname}")
+
+        endpoint = await worker_pool.endpoint_for(address) if address else None
+        if endpoint is not None:
+            worker_pool.set_draining(endpoint.address, status == "draining")
+            if capacity is not None:
+                worker_pool.update_capacity(endpoint.address, capacity)
+        logger.info("💚 Heartbeat received from %s (%s)", hostname, status)
         return task_pb2.HeartbeatResponse(status="ack", message="Heartbeat updated")
 
+    async def ReportResults(self, request, context):
+        """Pull mode: apply a worker's batch of results (and hand-backs) in one transaction each."""
+        requeued = [r.id for r in request.results if r.status == "requeued"]
+        with stage_timer("db.report_results"):
+            if requeued:
+                # The worker was draining and never started these
+                await hand_back(requeued)
+            applied = await record_results(request.results)
+        for result in request.results:
+            logger.info(
+                "✅ Task %s on %s: %s - %s", result.id, request.hostname,
+                applied.get(result.id, result.status), result.message,
+                extra={"task_id": result.id},
+            )
+        return task_pb2.ReportResponse(recorded=len(applied) + len(requeued))
+
+    async def PullTasks(self, request_iterator, context):
+        """
+        Pull mode: stream batches to a worker, never more than the credit it
+        has granted, packed into the resources it last reported free. The
+        worker adds credit as slots free up.
+        """
+        stream = PullStream()
+        reader = asyncio.create_task(stream.read(request_iterator))
+        try:
+            # The worker closing its side (drain) means: send nothing more
+            while not stream.closed:
+                if stream.credit <= 0:
+                    if not await stream.wait_for_credit(None):
+                        return
+                    continue
+                tasks = [] if _shutting_down else await claim_due_tasks(stream.credit, stream.accept)
+                if not tasks:
+                    # Nothing due: re-check on the next cycle or on new credit
+                    if not await stream.wait_for_credit(CHECK_INTERVAL):
+                        return
+                    continue
+                stream.credit -= len(tasks)
+                for task in tasks:
+                    logger.info(
+                        "🚀 Streaming Task %s to %s: %s", task.id, stream.hostname, task.command,
+                        extra={"task_id": task.id},
+                    )
+                batch = task_pb2.TaskBatch(tasks=[task_request(t, t.trace_parent or "") for t in tasks])
+                try:
+                    await context.write(batch)
+                except BaseException:
+                    # The stream broke before the batch was written
+                    await asyncio.shield(hand_back([t.id for t in tasks]))
+                    raise
+        finally:
+            reader.cancel()
+            logger.info("🔌 Pull stream from %s closed.", stream.hostname)
+
+
+class PullStream:
+    """Credit and free-resource bookkeeping for one worker's PullTasks stream."""
+
+    def __init__(self):
+        self.hostname = "unknown"
+        self.credit = 0
+        self.available = None     # Resources the worker last reported free; None = unknown
+        self.capacity = None      # the worker's total resources; None = unknown
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    async def read(self, request_iterator):
+        try:
+            async for req in request_iterator:
+                self.hostname = req.hostname or self.hostname
+                self.credit += req.credit
+                if req.HasField("available"):
+                    self.available = Resources.from_proto(req.available)
+                if req.HasField("capacity"):
+                    self.capacity = Resources.from_proto(req.capacity)
+                self._changed.set()
+        finally:
+            self.closed = True
+            self._changed.set()
+
+    def accept(self, need: Resources) -> bool:
+        """Placement plan for claim_due_tasks: take what fits in the worker's free resources."""
+        if self.available is None:
+            return True
+        need = need.fitted(self.capacity)
+        if not need.fits_in(self.available):
+            return False
+        self.available = self.available - need
+        return True
+
+    async def wait_for_credit(self, timeout):
+        """Wait for new credit (or `timeout`); False once the worker closed its side."""
+        if not self.closed:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+        return not self.closed
+
 
 # ===============================
 #  Dead Worker Cleanup
 # ===============================
 async def check_dead_workers():
-    """Periodically scan for dead workers (no heartbeat for 30s)."""
+    """Periodically scan for dead workers (no heartbeat for 30s); one shard does it for all."""
     while True:
-        async with AsyncSessionLocal() as session:
-            threshold = datetime.now(timezone.utc) - timedelta(seconds=HEARTBEAT_TIMEOUT)
-            result = await session.execute(select(Worker).where(Worker.last_heartbeat < threshold))
-            dead_workers = result.scalars().all()
-
-            for w in dead_workers:
-                if w.status != "dead":
-                    w.status = "dead"
-                    logger.warning(f"💀 Worker {w.hostname} marked as dead.")
-            await session.commit()
+        if shard is not None and not shard.is_leader():
+            await asyncio.sleep(HEARTBEAT_TIMEOUT)
+            continue
+        try:
+            async with AsyncSessionLocal() as session:
+                threshold = datetime.now(timezone.utc) - timedelta(seconds=HEARTBEAT_TIMEOUT)
+                result = await session.execute(select(Worker).where(Worker.last_heartbeat < threshold))
+                dead_workers = result.scalars().all()
+
+                for w in dead_workers:
+                    if w.status != "dead":
+                        w.status = "dead"
+                        await publish_worker_event(session, w.hostname, w.status)
+                        logger.warning(f"💀 Worker {w.hostname} marked as dead.")
+                await session.commit()
+        except Exception as e:
+            logger.error("❌ Dead worker scan failed: %r", e)
 
         await asyncio.sleep(HEARTBEAT_TIMEOUT)
 
 
+async def sync_worker_state():
+    """
+    Sharding: a worker heartbeats to one coordinator only, so every shard
+    reads capacity and draining state back from the workers table.
+    """
+    while True:
+        await asyncio.sleep(sharding.LEASE_RENEW)
+        try:
+            threshold = datetime.now(timezone.utc) - timedelta(seconds=HEARTBEAT_TIMEOUT)
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(Worker).where(Worker.address.isnot(None), Worker.last_heartbeat >= threshold)
+                )
+                workers = result.scalars().all()
+            for w in workers:
+                endpoint = await worker_pool.endpoint_for(w.address)
+                if endpoint is None:
+                    continue
+                worker_pool.set_draining(endpoint.address, w.status == "draining")
+                if w.capacity:
+                    worker_pool.update_capacity(endpoint.address, Resources(**w.capacity))
+        except Exception as e:
+            logger.warning("⚠️ Worker state refresh failed: %r", e)
+
+
 # ===============================
 #  Coordinator Entry Point
 # ===============================
 async def serve_heartbeat():
-    """Start gRPC server to receive heartbeats."""
-    server = grpc.aio.server()
+    """Start gRPC server for heartbeats (and pull streams); returns it so shutdown can stop it last."""
+    server = grpc_options.server()
     task_pb2_grpc.add_WorkerServiceServicer_to_server(HeartbeatService(), server)
 
     heartbeat_port = int(os.getenv("COORDINATOR_HEARTBEAT_PORT", "50052"))
@@ -159,18 +584,58 @@ async def serve_heartbeat():
 
     await server.start()
     logger.info(f"💓 Heartbeat listener running on port {heartbeat_port}...")
-    await server.wait_for_termination()
+    return server
 
 
 async def main():
-    """Run all coordinator services concurrently."""
-    await asyncio.gather(
-        poll_and_dispatch(),
-        check_dead_workers(),
-        serve_heartbeat()
-    )
+    """Run all coordinator services concurrently; drain gracefully on SIGTERM/SIGINT."""
+    global _shutting_down
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    if shard is not None:
+        await shard.renew()
+    server = await serve_heartbeat()
+    loops = [check_dead_workers(), monitor_event_loop()]
+    if shard is not None:
+        loops.append(shard.keep_alive())
+        if DISPATCH_MODE != "pull":
+            loops.append(sync_worker_state())
+    if DISPATCH_MODE == "pull":
+        logger.info("📥 Pull mode: workers fetch tasks over PullTasks streams.")
+    else:
+        loops.append(poll_and_dispatch())
+    services = [asyncio.create_task(c) for c in loops]
+
+    # A loop that dies (they log and retry their own errors) stops the process,
+    # so the orchestrator restarts it instead of it idling without dispatching
+    stopping = asyncio.create_task(stop.wait())
+    pending, failed = {stopping, *services}, None
+    while not (stop.is_set() or failed):
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        # Loops that are switched off (e.g. profiling) simply return
+        failed = next((t.exception() for t in done if t is not stopping and t.exception()), None)
+    if failed:
+        logger.critical("💥 Coordinator loop crashed: %r", failed)
+    _shutting_down = True
+    logger.warning("🛑 Coordinator shutting down: no new tasks will be claimed.")
+    stopping.cancel()
+    for service in services:
+        service.cancel()
+    await asyncio.gather(*services, return_exceptions=True)
+
+    await drain_dispatches()
+    if shard is not None:
+        await shard.release()
+    await worker_pool.close()
+    await server.stop(grace=5)
+    await dispose_engine()
+    logger.info("👋 Coordinator stopped.")
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
     logger.info("⚙️ Coordinator service started.")
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
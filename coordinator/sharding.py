@@ -0,0 +1,141 @@
+"""
+Coordinator sharding: several coordinators split the task table between them.
+
+Every task falls into one of BUCKETS buckets (Task.id % BUCKETS). Live
+coordinators hold a row in `coordinator_leases`, renewed every
+SHARD_LEASE_RENEW seconds; a shard whose lease runs out (SHARD_LEASE_TTL) is
+considered dead. Buckets are assigned with a consistent-hash ring over the live
+shards, so a join or a death only moves ~1/N of the buckets and each
+coordinator only ever claims rows from its own buckets.
+
+    SHARDING_ENABLED=1          opt in (default: one coordinator owns everything)
+    COORDINATOR_SHARD_ID=...    stable name for this shard (default host-pid)
+    SHARD_LEASE_TTL=15          seconds without renewal before a shard is dead
+    SHARD_LEASE_RENEW=5         seconds between renewals / membership refreshes
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from scheduler.services.db import AsyncSessionLocal
+from scheduler.models import CoordinatorLease
+
+# Shares the handler configured by coordinator.main
+logger = logging.getLogger("Coordinator")
+
+ENABLED = os.getenv("SHARDING_ENABLED", "").lower() in ("1", "true", "yes")
+SHARD_ID = os.getenv("COORDINATOR_SHARD_ID") or f"{socket.gethostname()}-{os.getpid()}"
+LEASE_TTL = float(os.getenv("SHARD_LEASE_TTL", "15"))
+LEASE_RENEW = float(os.getenv("SHARD_LEASE_RENEW", "5"))
+
+BUCKETS = 256             # Task.id % BUCKETS; fixed, so every shard agrees
+VIRTUAL_NODES = 64        # ring points per shard, evens out bucket counts
+STALE_LEASE_FACTOR = 10   # expired leases older than TTL * this are deleted
+
+
+def _point(key: str) -> int:
+    # Stable across processes (unlike hash())
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring mapping buckets to shard ids."""
+
+    def __init__(self, shards):
+        ring = sorted(
+            (_point(f"{shard}#{v}"), shard) for shard in shards for v in range(VIRTUAL_NODES)
+        )
+        self._points = [p for p, _ in ring]
+        self._shards = [s for _, s in ring]
+
+    def owner(self, bucket: int):
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, _point(f"bucket-{bucket}")) % len(self._points)
+        return self._shards[i]
+
+    def buckets_for(self, shard: str):
+        return frozenset(b for b in range(BUCKETS) if self.owner(b) == shard)
+
+
+class ShardMembership:
+    """This coordinator's lease and the buckets it currently owns."""
+
+    def __init__(self, shard_id: str = SHARD_ID):
+        self.shard_id = shard_id
+        self.members = ()
+        self.owned = frozenset()
+        self._valid_until = 0.0     # monotonic deadline of our last successful renewal
+
+    def current_buckets(self):
+        """Buckets we may claim from now; none once our own lease may have lapsed."""
+        if time.monotonic() >= self._valid_until:
+            return frozenset()
+        return self.owned
+
+    def is_leader(self) -> bool:
+        """True on one live shard (the lowest id) for cluster-wide chores such as dead-worker scans."""
+        return time.monotonic() < self._valid_until and self.members[:1] == (self.shard_id,)
+
+    def live_shards(self) -> int:
+        return max(1, len(self.members))
+
+    async def renew(self):
+        """Renew our lease, then recompute ownership from the live leases."""
+        now = datetime.now(timezone.utc)
+        renewed = time.monotonic()
+        async with AsyncSessionLocal() as session:
+            lease = await session.get(CoordinatorLease, self.shard_id)
+            if lease is None:
+                session.add(CoordinatorLease(
+                    shard_id=self.shard_id, acquired_at=now, expires_at=now + timedelta(seconds=LEASE_TTL),
+                ))
+            else:
+                lease.expires_at = now + timedelta(seconds=LEASE_TTL)
+            await session.execute(
+                delete(CoordinatorLease).where(
+                    CoordinatorLease.expires_at < now - timedelta(seconds=LEASE_TTL * STALE_LEASE_FACTOR)
+                )
+            )
+            await session.flush()
+            result = await session.execute(
+                select(CoordinatorLease.shard_id).where(CoordinatorLease.expires_at > now)
+            )
+            members = tuple(sorted(result.scalars().all()))
+            await session.commit()
+        self._valid_until = renewed + LEASE_TTL
+        self._rebalance(members)
+
+    def _rebalance(self, members):
+        if members == self.members:
+            return
+        owned = HashRing(members).buckets_for(self.shard_id)
+        gained, lost = len(owned - self.owned), len(self.owned - owned)
+        self.members, self.owned = members, owned
+        logger.info(
+            "🧩 Shard %s: %s live shard(s), owning %s/%s bucket(s) (+%s / -%s).",
+            self.shard_id, len(members), len(owned), BUCKETS, gained, lost,
+        )
+
+    async def keep_alive(self):
+        """Renew the lease forever; a failed renewal is retried next round."""
+        while True:
+            await asyncio.sleep(LEASE_RENEW)
+            try:
+                await self.renew()
+            except Exception as e:
+                logger.warning("⚠️ Shard lease renewal failed: %s", e)
+
+    async def release(self):
+        """Drop our lease on shutdown so the others take over our buckets right away."""
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(CoordinatorLease).where(CoordinatorLease.shard_id == self.shard_id))
+            await session.commit()
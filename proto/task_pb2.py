@@ -24,21 +24,35 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\ntask.proto\x12\x08taskflow\"*\n\x0bTaskRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0f\n\x07\x63ommand\x18\x02 \x01(\t\";\n\x0cTaskResponse\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\"$\n\x10HeartbeatRequest\x12\x10\n\x08hostname\x18\x01 \x01(\t\"4\n\x11HeartbeatResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t2\x93\x01\n\rWorkerService\x12<\n\x0b\x45xecuteTask\x12\x15.taskflow.TaskRequest\x1a\x16.taskflow.TaskResponse\x12\x44\n\tHeartbeat\x12\x1a.taskflow.HeartbeatRequest\x1a\x1b.taskflow.HeartbeatResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\ntask.proto\x12\x08taskflow\"\x88\x01\n\tResources\x12\x0b\n\x03\x63pu\x18\x01 \x01(\x01\x12\x11\n\tmemory_mb\x18\x02 \x01(\x03\x12-\n\x05named\x18\x03 \x03(\x0b\x32\x1e.taskflow.Resources.NamedEntry\x1a,\n\nNamedEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"h\n\x0bTaskRequest\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x0f\n\x07\x63ommand\x18\x02 \x01(\t\x12\x14\n\x0ctrace_parent\x18\x03 \x01(\t\x12&\n\tresources\x18\x04 \x01(\x0b\x32\x13.taskflow.Resources\"e\n\x0cTaskResponse\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x12\n\nstarted_at\x18\x04 \x01(\x01\x12\x14\n\x0c\x63ompleted_at\x18\x05 \x01(\x01\"1\n\tTaskBatch\x12$\n\x05tasks\x18\x01 \x03(\x0b\x32\x15.taskflow.TaskRequest\"H\n\x0bResultBatch\x12\x10\n\x08hostname\x18\x01 \x01(\t\x12\'\n\x07results\x18\x02 \x03(\x0b\x32\x16.taskflow.TaskResponse\"\"\n\x0eReportResponse\x12\x10\n\x08recorded\x18\x01 \x01(\x05\"l\n\x10HeartbeatRequest\x12\x10\n\x08hostname\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x0f\n\x07\x61\x64\x64ress\x18\x03 \x01(\t\x12%\n\x08\x63\x61pacity\x18\x04 \x01(\x0b\x32\x13.taskflow.Resources\"4\n\x11HeartbeatResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\"~\n\x0bPullRequest\x12\x10\n\x08hostname\x18\x01 \x01(\t\x12\x0e\n\x06\x63redit\x18\x02 \x01(\x05\x12&\n\tavailable\x18\x03 \x01(\x0b\x32\x13.taskflow.Resources\x12%\n\x08\x63\x61pacity\x18\x04 \x01(\x0b\x32\x13.taskflow.Resources2\xce\x02\n\rWorkerService\x12<\n\x0b\x45xecuteTask\x12\x15.taskflow.TaskRequest\x1a\x16.taskflow.TaskResponse\x12:\n\x0c\x45xecuteTasks\x12\x13.taskflow.TaskBatch\x1a\x15.taskflow.ResultBatch\x12\x44\n\tHeartbeat\x12\x1a.taskflow.HeartbeatRequest\x1a\x1b.taskflow.HeartbeatResponse\x12;\n\tPullTasks\x12\x15.taskflow.PullRequest\x1a\x13.taskflow.TaskBatch(\x01\x30\x01\x12@\n\rReportResults\x12\x15.taskflow.ResultBatch\x1a\x18.taskflow.ReportResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'task_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_TASKREQUEST']._serialized_start=24
-  _globals['_TASKREQUEST']._serialized_end=66
-  _globals['_TASKRESPONSE']._serialized_start=68
-  _globals['_TASKRESPONSE']._serialized_end=127
-  _globals['_HEARTBEATREQUEST']._serialized_start=129
-  _globals['_HEARTBEATREQUEST']._serialized_end=165
-  _globals['_HEARTBEATRESPONSE']._serialized_start=167
-  _globals['_HEARTBEATRESPONSE']._serialized_end=219
-  _globals['_WORKERSERVICE']._serialized_start=222
-  _globals['_WORKERSERVICE']._serialized_end=369
+  _globals['_RESOURCES_NAMEDENTRY']._loaded_options = None
+  _globals['_RESOURCES_NAMEDENTRY']._serialized_options = b'8\001'
+  _globals['_RESOURCES']._serialized_start=25
+  _globals['_RESOURCES']._serialized_end=161
+  _globals['_RESOURCES_NAMEDENTRY']._serialized_start=117
+  _globals['_RESOURCES_NAMEDENTRY']._serialized_end=161
+  _globals['_TASKREQUEST']._serialized_start=163
+  _globals['_TASKREQUEST']._serialized_end=267
+  _globals['_TASKRESPONSE']._serialized_start=269
+  _globals['_TASKRESPONSE']._serialized_end=370
+  _globals['_TASKBATCH']._serialized_start=372
+  _globals['_TASKBATCH']._serialized_end=421
+  _globals['_RESULTBATCH']._serialized_start=423
+  _globals['_RESULTBATCH']._serialized_end=495
+  _globals['_REPORTRESPONSE']._serialized_start=497
+  _globals['_REPORTRESPONSE']._serialized_end=531
+  _globals['_HEARTBEATREQUEST']._serialized_start=533
+  _globals['_HEARTBEATREQUEST']._serialized_end=641
+  _globals['_HEARTBEATRESPONSE']._serialized_start=643
+  _globals['_HEARTBEATRESPONSE']._serialized_end=695
+  _globals['_PULLREQUEST']._serialized_start=697
+  _globals['_PULLREQUEST']._serialized_end=823
+  _globals['_WORKERSERVICE']._serialized_start=826
+  _globals['_WORKERSERVICE']._serialized_end=1160
 # @@protoc_insertion_point(module_scope)
@@ -36,12 +36,30 @@ class WorkerServiceStub(object):
             response_deserializer=task_pb2.TaskResponse.FromString,
             _registered_method=True
         )
+        self.ExecuteTasks = channel.unary_unary(
+            '/taskflow.WorkerService/ExecuteTasks',
+            request_serializer=task_pb2.TaskBatch.SerializeToString,
+            response_deserializer=task_pb2.ResultBatch.FromString,
+            _registered_method=True
+        )
         self.Heartbeat = channel.unary_unary(
             '/taskflow.WorkerService/Heartbeat',
             request_serializer=task_pb2.HeartbeatRequest.SerializeToString,
             response_deserializer=task_pb2.HeartbeatResponse.FromString,
             _registered_method=True
         )
+        self.PullTasks = channel.stream_stream(
+            '/taskflow.WorkerService/PullTasks',
+            request_serializer=task_pb2.PullRequest.SerializeToString,
+            response_deserializer=task_pb2.TaskBatch.FromString,
+            _registered_method=True
+        )
+        self.ReportResults = channel.unary_unary(
+            '/taskflow.WorkerService/ReportResults',
+            request_serializer=task_pb2.ResultBatch.SerializeToString,
+            response_deserializer=task_pb2.ReportResponse.FromString,
+            _registered_method=True
+        )
 
 
 class WorkerServiceServicer(object):
@@ -52,11 +70,26 @@ class WorkerServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ExecuteTasks(self, request, context):
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Heartbeat(self, request, context):
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def PullTasks(self, request_iterator, context):
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReportResults(self, request, context):
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_WorkerServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -65,11 +98,26 @@ def add_WorkerServiceServicer_to_server(servicer, server):
             request_deserializer=task_pb2.TaskRequest.FromString,
             response_serializer=task_pb2.TaskResponse.SerializeToString,
         ),
+        'ExecuteTasks': grpc.unary_unary_rpc_method_handler(
+            servicer.ExecuteTasks,
+            request_deserializer=task_pb2.TaskBatch.FromString,
+            response_serializer=task_pb2.ResultBatch.SerializeToString,
+        ),
         'Heartbeat': grpc.unary_unary_rpc_method_handler(
             servicer.Heartbeat,
             request_deserializer=task_pb2.HeartbeatRequest.FromString,
             response_serializer=task_pb2.HeartbeatResponse.SerializeToString,
         ),
+        'PullTasks': grpc.stream_stream_rpc_method_handler(
+            servicer.PullTasks,
+            request_deserializer=task_pb2.PullRequest.FromString,
+            response_serializer=task_pb2.TaskBatch.SerializeToString,
+        ),
+        'ReportResults': grpc.unary_unary_rpc_method_handler(
+            servicer.ReportResults,
+            request_deserializer=task_pb2.ResultBatch.FromString,
+            response_serializer=task_pb2.ReportResponse.SerializeToString,
+        ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
         'taskflow.WorkerService', rpc_method_handlers
@@ -109,6 +157,32 @@ class WorkerService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ExecuteTasks(request, target,
+                     options=(),
+                     channel_credentials=None,
+                     call_credentials=None,
+                     insecure=False,
+                     compression=None,
+                     wait_for_ready=None,
+                     timeout=None,
+                     metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/taskflow.WorkerService/ExecuteTasks',
+            task_pb2.TaskBatch.SerializeToString,
+            task_pb2.ResultBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def Heartbeat(request, target,
                   options=(),
@@ -134,3 +208,55 @@ class WorkerService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def PullTasks(request_iterator, target,
+                  options=(),
+                  channel_credentials=None,
+                  call_credentials=None,
+                  insecure=False,
+                  compression=None,
+                  wait_for_ready=None,
+                  timeout=None,
+                  metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/taskflow.WorkerService/PullTasks',
+            task_pb2.PullRequest.SerializeToString,
+            task_pb2.TaskBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReportResults(request, target,
+                      options=(),
+                      channel_credentials=None,
+                      call_credentials=None,
+                      insecure=False,
+                      compression=None,
+                      wait_for_ready=None,
+                      timeout=None,
+                      metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/taskflow.WorkerService/ReportResults',
+            task_pb2.ResultBatch.SerializeToString,
+            task_pb2.ReportResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -7,6 +7,7 @@ from fastapi.responses import JSONResponse, StreamingResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from datetime import datetime, timezone
+from typing import List, Optional, Union
 from prometheus_client import Gauge, generate_latest, CONTENT_TYPE_LATEST
 import asyncio
 import json
@@ -15,14 +16,23 @@ from ..services.db import get_db, AsyncSessionLocal
 from ..models import Task, Worker
 from .schemas import TaskCreate, TaskRead
 from scheduler.core.limiter import limiter
+from scheduler.core.quotas import enforce_quota
+from scheduler.core.cache import task_cache, worker_cache, etag_response
+from scheduler.core.hub import task_hub, TERMINAL_STATES
+from scheduler.services import notify
+from utils.tracing import start_span, SERVER
 
 router = APIRouter()
 
+STATUS_BATCH_MAX = 500      # max ids per /status?ids=... lookup
+WAIT_TIMEOUT_DEFAULT = 30   # seconds a wait request is held open by default
+WAIT_TIMEOUT_MAX = 60       # upper bound for ?timeout=
+
 # ======================================================
 #  Task Scheduling + Status Endpoints
 # ======================================================
 
-@router.post("/schedule", response_model=TaskRead)
+@router.post("/schedule", response_model=TaskRead, dependencies=[Depends(enforce_quota)])
 @limiter.limit("5/minute")
 async def schedule_task(
     request: Request,
@@ -37,21 +47,155 @@ async def schedule_task(
     else:
         scheduled_at = scheduled_at.astimezone(timezone.utc)
 
-    new_task = Task(command=task.command, scheduled_at=scheduled_at)
-    db.add(new_task)
-    await db.commit()
-    await db.refresh(new_task)
+    # Root of the task's trace; coordinator and worker spans hang off it
+    with start_span("schedule_task", parent=request.headers.get("traceparent"), kind=SERVER) as span:
+        new_task = Task(
+            command=task.command,
+            scheduled_at=scheduled_at,
+            retry_policy=task.retry_policy.model_dump(exclude_none=True) if task.retry_policy else None,
+            resources=task.resources.model_dump(exclude_none=True) if task.resources else None,
+            trace_parent=span.traceparent,
+        )
+        db.add(new_task)
+        with start_span("db.commit"):
+            await db.commit()
+        await db.refresh(new_task)
+        span.set_attribute("task.id", new_task.id)
     return new_task
 
 
-@router.get("/status", response_model=TaskRead)
-async def get_task_status(task_id: int, db: AsyncSession = Depends(get_db)):
-    """Get the current status of a scheduled task."""
-    result = await db.execute(select(Task).where(Task.id == task_id))
-    task = result.scalars().first()
-    if not task:
+# A TaskRead for ?task_id=, a list of them for ?ids=
+@router.get("/status", response_model=Union[TaskRead, List[TaskRead]])
+async def get_task_status(
+    request: Request,
+    task_id: Optional[int] = None,
+    ids: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the current status of a scheduled task.
+    Pass `ids=1,2,3` instead of `task_id` to look up many tasks in one query;
+    unknown ids are left out of the returned list.
+    """
+    if task_id is None and ids is None:
+        raise HTTPException(status_code=422, detail="task_id or ids is required")
+
+    wanted = _parse_ids(ids) if ids is not None else [task_id]
+
+    found = await _load_task_status(db, wanted)
+
+    if ids is None:
+        if task_id not in found:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return etag_response(request, found[task_id])
+    return etag_response(request, [found[i] for i in wanted if i in found])
+
+
+def _parse_ids(ids: str):
+    try:
+        wanted = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    if not wanted:
+        raise HTTPException(status_code=422, detail="ids must not be empty")
+    if len(wanted) > STATUS_BATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {STATUS_BATCH_MAX} ids per request")
+    return list(dict.fromkeys(wanted))
+
+
+async def _load_task_status(db: AsyncSession, task_ids):
+    """Serve from the status cache, fetching all misses in a single query."""
+    found = {}
+    misses = []
+    for tid in task_ids:
+        cached = task_cache.get(tid)
+        if cached is None:
+            misses.append(tid)
+        else:
+            found[tid] = cached
+
+    if misses:
+        token = task_cache.token()
+        result = await db.execute(select(Task).where(Task.id.in_(misses)))
+        for t in result.scalars().all():
+            data = TaskRead.model_validate(t).model_dump(mode="json")
+            task_cache.set(t.id, data, token)
+            found[t.id] = data
+
+    return found
+
+
+# ======================================================
+#  Long-poll: wait for tasks to finish
+# ======================================================
+
+async def _wait_for_tasks(task_ids, timeout: float, mode: str):
+    """
+    Hold until the tasks reach a terminal state (`mode="all"`) or at least
+    one does (`mode="any"`), or until `timeout` expires.
+    Woken by the task hub, so nothing polls the DB while waiting. Without
+    notifications (e.g. SQLite) the hub never fires: re-check once per
+    status-cache TTL instead.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    check = all if mode == "all" else any
+
+    with task_hub.watch(task_ids) as event:
+        while True:
+            event.clear()
+            # Short-lived session: don't pin a pool connection while waiting
+            async with AsyncSessionLocal() as db:
+                found = await _load_task_status(db, task_ids)
+
+            known = [i for i in task_ids if i in found]
+            finished = [i for i in known if found[i]["status"] in TERMINAL_STATES]
+            remaining = deadline - loop.time()
+            # Unknown ids will never finish, so they don't hold the request
+            if not known or check(i in finished for i in known) or remaining <= 0:
+                return found, finished
+            if not notify.ENABLED:
+                remaining = min(remaining, task_cache.ttl)
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _clamp_timeout(timeout: Optional[float]) -> float:
+    if timeout is None:
+        return WAIT_TIMEOUT_DEFAULT
+    return max(0.0, min(timeout, WAIT_TIMEOUT_MAX))
+
+
+@router.get("/tasks/{task_id}/wait", response_model=TaskRead)
+async def wait_for_task(task_id: int, timeout: Optional[float] = None):
+    """
+    Return as soon as the task is done/failed.
+    Responds 200 when finished, 202 with the current state if `timeout` expired.
+    """
+    found, finished = await _wait_for_tasks([task_id], _clamp_timeout(timeout), "all")
+    if task_id not in found:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return JSONResponse(found[task_id], status_code=200 if finished else 202)
+
+
+@router.get("/tasks/wait")
+async def wait_for_tasks(ids: str, timeout: Optional[float] = None, mode: str = "all"):
+    """
+    Multi-task wait: `ids=1,2,3`, `mode=all` (default) or `mode=any`.
+    Returns every known task plus the ids still pending when it returned.
+    """
+    if mode not in ("all", "any"):
+        raise HTTPException(status_code=422, detail="mode must be 'all' or 'any'")
+    task_ids = _parse_ids(ids)
+
+    found, finished = await _wait_for_tasks(task_ids, _clamp_timeout(timeout), mode)
+    return JSONResponse({
+        "tasks": [found[i] for i in task_ids if i in found],
+        "pending": [i for i in task_ids if i in found and i not in finished],
+        "missing": [i for i in task_ids if i not in found],
+    })
 
 
 # ======================================================
@@ -102,20 +246,24 @@ async def list_workers(
 ):
 
 # async def list_workers(db: AsyncSession = Depends(get_db)):
-    """List all workers with their status (alive/dead)."""
-    result = await db.execute(select(Worker))
-    workers = result.scalars().all()
-
-    out = [
-        {
-            "id": w.id,
-            "hostname": w.hostname,
-            "status": w.status,
-            "last_heartbeat": w.last_heartbeat.isoformat() if w.last_heartbeat else None,
-        }
-        for w in workers
-    ]
-    return JSONResponse(out)
+    """List all workers with their status (alive/draining/dead)."""
+    out = worker_cache.get("all")
+    if out is None:
+        token = worker_cache.token()
+        result = await db.execute(select(Worker))
+        workers = result.scalars().all()
+
+        out = [
+            {
+                "id": w.id,
+                "hostname": w.hostname,
+                "status": w.status,
+                "last_heartbeat": w.last_heartbeat.isoformat() if w.last_heartbeat else None,
+            }
+            for w in workers
+        ]
+        worker_cache.set("all", out, token)
+    return etag_response(request, out)
 
 
 # ======================================================
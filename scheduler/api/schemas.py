@@ -1,10 +1,30 @@
 # scheduler/api/schemas.py
 from datetime import datetime
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class RetryPolicyCreate(BaseModel):
+    """Per-task retry overrides; omitted fields use the service defaults."""
+    max_attempts: Optional[int] = Field(None, ge=1, le=100)
+    base_delay: Optional[float] = Field(None, ge=0)
+    max_delay: Optional[float] = Field(None, ge=0)
+    jitter: Optional[Literal["none", "full", "decorrelated"]] = None
+    retry_on: Optional[List[Literal["dispatch", "execution"]]] = None
+
+
+class ResourceRequest(BaseModel):
+    """What the task needs on a worker; omitted fields use the service defaults."""
+    cpu: Optional[float] = Field(None, gt=0)
+    memory_mb: Optional[int] = Field(None, ge=0)
+    named: Optional[Dict[str, float]] = None   # e.g. {"gpu": 1, "matlab_license": 1}
+
 
 class TaskCreate(BaseModel):
     command: str
     scheduled_at: datetime
+    retry_policy: Optional[RetryPolicyCreate] = None
+    resources: Optional[ResourceRequest] = None
 
 
 class TaskRead(BaseModel):
@@ -0,0 +1,106 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.responses import Response
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache with per-entry TTL.
+
+    Invalidation leaves a tombstone so that a reader which started its DB
+    query *before* the invalidation cannot put the stale row back:
+        token = cache.token()
+        row = await load()
+        cache.set(key, row, token)
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 10.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (expires_at, value, stamp)
+        self._clock = itertools.count(1)
+        self._cleared_at = 0
+
+    def token(self) -> int:
+        return next(self._clock)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        if value is _MISSING:
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, token: int = None):
+        if token is not None:
+            if token < self._cleared_at:
+                return
+            entry = self._data.get(key)
+            if entry is not None and entry[2] > token:
+                return
+        self._put(key, value)
+
+    def invalidate(self, key):
+        self._put(key, _MISSING)
+
+    def clear(self):
+        self._data.clear()
+        self._cleared_at = self.token()
+
+    def _put(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value, self.token())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+# Task status by id, and the worker list (single key)
+task_cache = TTLCache(
+    maxsize=int(os.getenv("STATUS_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("STATUS_CACHE_TTL", "10")),
+)
+worker_cache = TTLCache(
+    maxsize=1,
+    ttl=float(os.getenv("WORKERS_CACHE_TTL", "5")),
+)
+
+
+def on_task_event(payload):
+    if payload is None:
+        task_cache.clear()
+    else:
+        task_cache.invalidate(payload.get("id"))
+
+
+def on_worker_event(payload):
+    worker_cache.clear()
+
+
+# ======================================================
+#  Conditional responses (ETag / If-None-Match)
+# ======================================================
+def etag_response(request: Request, payload) -> Response:
+    """Serialize `payload` once; answer 304 if the client already has it."""
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
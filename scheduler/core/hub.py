@@ -0,0 +1,48 @@
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Task states after which a task will not change again
+TERMINAL_STATES = {"done", "failed"}
+
+
+class TaskEventHub:
+    """
+    In-process fan-out of task state-change notifications to waiting requests.
+
+    Each waiter registers one asyncio.Event for the task ids it cares about;
+    the event is set when any of them reaches a terminal state, so the waiter
+    re-reads only when something relevant happened.
+    """
+
+    def __init__(self):
+        self._watchers = defaultdict(set)   # task_id -> {asyncio.Event}
+
+    @contextmanager
+    def watch(self, task_ids):
+        event = asyncio.Event()
+        for tid in task_ids:
+            self._watchers[tid].add(event)
+        try:
+            yield event
+        finally:
+            for tid in task_ids:
+                events = self._watchers.get(tid)
+                if events is not None:
+                    events.discard(event)
+                    if not events:
+                        del self._watchers[tid]
+
+    def on_task_event(self, payload):
+        if payload is None:
+            # Events may have been missed: wake everyone to re-check
+            targets = {ev for events in self._watchers.values() for ev in events}
+        elif payload.get("status") in TERMINAL_STATES:
+            targets = self._watchers.get(payload.get("id"), ())
+        else:
+            return
+        for event in list(targets):
+            event.set()
+
+
+task_hub = TaskEventHub()
@@ -3,9 +3,94 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi.responses import JSONResponse
 from fastapi import Request
+import hashlib
+import ipaddress
+import os
+
+# ======================================
+# Environment knobs
+#   RATE_LIMIT_ENABLED=false          turn limits and quotas off (e.g. load tests)
+#   RATE_LIMIT_STORAGE_URI=memory://  shared counters for several replicas, e.g.
+#                                     redis://redis:6379 (any `limits` storage URI)
+#   TRUSTED_PROXIES=127.0.0.1,::1     peers (IPs/CIDRs) whose X-Forwarded-For is
+#                                     believed, e.g. the Nginx container network
+#   API_TENANTS=tok_abc=acme,...      known API tokens -> tenant name; only these
+#                                     tokens are keyed on, anything else is keyed
+#                                     on the client address
+# ======================================
+
+def parse_pairs(spec: str):
+    """Parse "a=1,b=2" into {"a": "1", "b": "2"}."""
+    pairs = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            pairs[key.strip()] = value.strip()
+    return pairs
+
+
+API_TENANTS = parse_pairs(os.getenv("API_TENANTS"))
+
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(n.strip(), strict=False)
+    for n in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",")
+    if n.strip()
+]
+
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in net for net in TRUSTED_PROXIES)
+
+
+def client_address(request: Request) -> str:
+    """Client IP, looking through X-Forwarded-For only as far as hops we trust."""
+    peer = get_remote_address(request)
+    if not _trusted(peer):
+        return peer
+    hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    # Right to left: the first address not added by one of our proxies is the client
+    for hop in reversed(hops):
+        if not _trusted(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def api_token(request: Request):
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip() or None
+    return request.headers.get("x-api-key") or None
+
+
+def known_token(request: Request):
+    """The request's API token if it is one we know (API_TENANTS), else None."""
+    token = api_token(request)
+    return token if token and token in API_TENANTS else None
+
+
+def client_key(request: Request) -> str:
+    """
+    Rate-limit identity: a known API token, else the client address.
+    Tokens are not verified here, so an unknown one must not get its own
+    counter: a client could send a fresh random token with every request.
+    """
+    token = known_token(request)
+    if token:
+        # Never keep raw tokens in limiter storage
+        return "token:" + hashlib.sha256(token.encode()).hexdigest()[:16]
+    return "ip:" + client_address(request)
+
 
 # Global limiter instance
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=client_key,
+    storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://"),
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() not in ("0", "false", "no"),
+)
 
 # Custom error handler
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
@@ -0,0 +1,185 @@
+"""
+Per-tenant token-bucket quotas for task submission.
+
+The fixed-window limits on each route (see limiter.py) stop runaway clients;
+quotas share capacity fairly: every tenant gets a bucket that refills at
+`rate` tokens/second up to `burst`, and each submitted task takes one token.
+
+    TENANT_QUOTAS=default=2:20,acme=50:200   tenant=rate:burst; unset = no quotas
+    API_TENANTS=tok_abc=acme,tok_def=globex  API token -> tenant name
+    QUOTA_BACKEND=memory|postgres            bucket storage (default: postgres when the DB is)
+
+Requests without a known token (no token, or one not in API_TENANTS) are
+their own tenant per client IP under the "default" quota. The Postgres store
+keeps buckets in one table, so every scheduler replica draws from the same bucket.
+"""
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request
+from sqlalchemy import text
+
+from scheduler.core.limiter import limiter, known_token, client_address, parse_pairs, API_TENANTS
+from scheduler.services.db import DIALECT, get_engine
+
+# Shares the handler configured by scheduler.main
+logger = logging.getLogger("Scheduler")
+
+MEMORY_MAX_BUCKETS = 10_000   # beyond this many keys: drop full buckets, then the oldest
+PRUNE_INTERVAL = 60.0         # seconds between deletes of refilled Postgres buckets (per replica)
+
+
+@dataclass(frozen=True)
+class Quota:
+    rate: float    # tokens per second
+    burst: float   # bucket size
+
+
+def _parse_quotas(spec: str):
+    quotas = {}
+    for tenant, value in parse_pairs(spec).items():
+        rate, _, burst = value.partition(":")
+        quotas[tenant] = Quota(float(rate), float(burst or rate))
+    return quotas
+
+
+QUOTAS = _parse_quotas(os.getenv("TENANT_QUOTAS"))
+
+
+def refill_horizon(quotas) -> float:
+    """Seconds after which any idle bucket is full again; None when some quota never refills."""
+    if not quotas or any(q.rate <= 0 for q in quotas.values()):
+        return None
+    return max(q.burst / q.rate for q in quotas.values())
+
+
+def tenant_for(request: Request) -> str:
+    token = known_token(request)
+    if token:
+        return API_TENANTS[token]
+    # Unknown tokens are ignored: each new one would otherwise be a fresh bucket
+    return "ip:" + client_address(request)
+
+
+# ======================================
+# Bucket stores
+# ======================================
+class MemoryBucketStore:
+    """Per-process buckets (single replica, or the SQLite stand-in)."""
+
+    def __init__(self, max_buckets: int = MEMORY_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        # key -> (tokens, monotonic time of last update, quota); least recently used first
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, quota: Quota, cost: float = 1):
+        now = time.monotonic()
+        tokens, updated, _ = self._buckets.pop(key, (quota.burst, now, quota))
+        tokens = min(quota.burst, tokens + (now - updated) * quota.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now, quota)
+        if len(self._buckets) > self.max_buckets:
+            self._prune(now)
+        return allowed, tokens
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is the same as no bucket
+        for key, (tokens, updated, quota) in list(self._buckets.items()):
+            if tokens + (now - updated) * quota.rate >= quota.burst:
+                del self._buckets[key]
+        # Still too many (keys come from clients): forget the longest-idle ones
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+
+
+# Refill and take in one statement; concurrent replicas serialize on the row lock.
+_REFILL = "LEAST(CAST(:burst AS float8), b.tokens + EXTRACT(EPOCH FROM now() - b.updated_at) * CAST(:rate AS float8))"
+_TAKE_SQL = text(f"""
+    INSERT INTO rate_limit_buckets AS b (key, tokens, allowed, updated_at)
+    VALUES (:key, CAST(:burst AS float8) - CAST(:cost AS float8), CAST(:burst AS float8) >= CAST(:cost AS float8), now())
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = {_REFILL} - CASE WHEN {_REFILL} >= CAST(:cost AS float8) THEN CAST(:cost AS float8) ELSE 0 END,
+        allowed = {_REFILL} >= CAST(:cost AS float8),
+        updated_at = now()
+    RETURNING allowed, tokens
+""")
+# A bucket idle for longer than the slowest refill is full, the same as no row
+_PRUNE_SQL = text("DELETE FROM rate_limit_buckets WHERE updated_at < now() - make_interval(secs => CAST(:age AS float8))")
+
+
+class PostgresBucketStore:
+    """Buckets shared by every scheduler replica (table rate_limit_buckets)."""
+
+    def __init__(self, prune_interval: float = PRUNE_INTERVAL):
+        self.prune_interval = prune_interval
+        self._pruned_at = time.monotonic()
+
+    async def take(self, key: str, quota: Quota, cost: float = 1):
+        async with get_engine().begin() as conn:
+            row = (await conn.execute(
+                _TAKE_SQL, {"key": key, "rate": quota.rate, "burst": quota.burst, "cost": cost}
+            )).one()
+        if time.monotonic() - self._pruned_at >= self.prune_interval:
+            await self.prune()
+        return row.allowed, row.tokens
+
+    async def prune(self):
+        """Delete buckets that have refilled (keys come from client IPs, so the table would only grow)."""
+        self._pruned_at = time.monotonic()
+        age = refill_horizon(QUOTAS)
+        if age is None:
+            return
+        try:
+            async with get_engine().begin() as conn:
+                result = await conn.execute(_PRUNE_SQL, {"age": age})
+            if result.rowcount:
+                logger.debug(f"Pruned {result.rowcount} refilled quota bucket(s).")
+        except Exception as e:
+            logger.warning(f"⚠️ Pruning quota buckets failed: {e}")
+
+
+def _make_store():
+    backend = os.getenv("QUOTA_BACKEND") or (
+        "postgres" if DIALECT == "postgresql" else "memory"
+    )
+    return PostgresBucketStore() if backend == "postgres" else MemoryBucketStore()
+
+
+store = _make_store()
+
+
+# ======================================
+# FastAPI dependency
+# ======================================
+async def enforce_quota(request: Request):
+    """Take one token from the caller's bucket; 429 with Retry-After when empty."""
+    if not QUOTAS or not limiter.enabled:
+        return
+    tenant = tenant_for(request)
+    quota = QUOTAS.get(tenant) or QUOTAS.get("default")
+    if quota is None:
+        return
+
+    try:
+        allowed, tokens = await store.take(tenant, quota)
+    except Exception as e:
+        # Fail open: an unavailable quota store must not stop task submission
+        logger.warning(f"⚠️ Quota check failed for {tenant}: {e}")
+        return
+
+    if not allowed:
+        retry_after = (1 - tokens) / quota.rate if quota.rate > 0 else 60
+        raise HTTPException(
+            status_code=429,
+            detail="Quota exceeded. Please slow down.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
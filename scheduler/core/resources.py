@@ -0,0 +1,90 @@
+"""
+Resource requests (what a task needs) and capacities (what a worker has).
+
+A task may declare CPU cores, memory and named resources such as licenses:
+    {"cpu": 2, "memory_mb": 4096, "named": {"matlab_license": 1}}
+Anything it leaves out counts as DEFAULT_TASK_CPU cores, no memory reservation
+and no named resources. That default CPU is shrunk to fit a smaller worker (e.g.
+a pod with a 500m quota), where an explicit request that big is rejected.
+"""
+import os
+from dataclasses import dataclass, field, replace
+
+DEFAULT_TASK_CPU = float(os.getenv("DEFAULT_TASK_CPU", "1"))
+
+_EPSILON = 1e-9
+
+
+@dataclass
+class Resources:
+    cpu: float = 0.0
+    memory_mb: int = 0
+    named: dict = field(default_factory=dict)
+    default_cpu: bool = field(default=False, compare=False, repr=False)   # cpu not requested
+
+    @classmethod
+    def for_task(cls, spec):
+        """Requirements of a task from its `resources` column (None = defaults)."""
+        spec = spec or {}
+        return cls(
+            cpu=float(spec.get("cpu") or DEFAULT_TASK_CPU),
+            memory_mb=int(spec.get("memory_mb") or 0),
+            named={k: float(v) for k, v in (spec.get("named") or {}).items()},
+            default_cpu=not spec.get("cpu"),
+        )
+
+    @classmethod
+    def for_request(cls, message):
+        """Requirements sent in a TaskRequest; cpu 0 means the default."""
+        return cls.for_task({"cpu": message.cpu, "memory_mb": message.memory_mb, "named": dict(message.named)})
+
+    def request_fields(self) -> dict:
+        """Fields for a TaskRequest's resources, keeping a default cpu unresolved."""
+        fields = self.as_dict()
+        if self.default_cpu:
+            fields["cpu"] = 0.0
+        return fields
+
+    def fitted(self, capacity: "Resources" = None) -> "Resources":
+        """These requirements on a worker with `capacity` (None = unknown): a default cpu is capped at its cores."""
+        if self.default_cpu and capacity is not None and 0 < capacity.cpu < self.cpu:
+            return replace(self, cpu=capacity.cpu)
+        return self
+
+    @classmethod
+    def from_proto(cls, message):
+        return cls(cpu=message.cpu, memory_mb=message.memory_mb, named=dict(message.named))
+
+    def as_dict(self) -> dict:
+        return {"cpu": self.cpu, "memory_mb": self.memory_mb, "named": dict(self.named)}
+
+    def fits_in(self, available: "Resources") -> bool:
+        return (
+            self.cpu <= available.cpu + _EPSILON
+            and self.memory_mb <= available.memory_mb
+            and all(v <= available.named.get(k, 0) + _EPSILON for k, v in self.named.items())
+        )
+
+    def __add__(self, other: "Resources") -> "Resources":
+        named = dict(self.named)
+        for k, v in other.named.items():
+            named[k] = named.get(k, 0) + v
+        return Resources(self.cpu + other.cpu, self.memory_mb + other.memory_mb, named)
+
+    def __sub__(self, other: "Resources") -> "Resources":
+        named = dict(self.named)
+        for k, v in other.named.items():
+            named[k] = named.get(k, 0) - v
+        return Resources(self.cpu - other.cpu, self.memory_mb - other.memory_mb, named)
+
+    def leftover_score(self, available: "Resources") -> float:
+        """
+        How much of `available` would be left after placing this request, as a
+        fraction (smaller = tighter fit). Used for best-fit bin packing.
+        """
+        parts = []
+        if available.cpu > 0:
+            parts.append((available.cpu - self.cpu) / available.cpu)
+        if available.memory_mb > 0:
+            parts.append((available.memory_mb - self.memory_mb) / available.memory_mb)
+        return sum(parts) / len(parts) if parts else 0.0
@@ -0,0 +1,92 @@
+import os
+import random
+from dataclasses import dataclass, fields, asdict
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+# Failure kinds a policy can choose to retry
+DISPATCH = "dispatch"      # task never reached a worker (after network retries)
+EXECUTION = "execution"    # command ran on a worker but failed / errored
+
+JITTER_MODES = ("none", "full", "decorrelated")
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How a task is retried after a failure.
+
+    jitter:
+      none          base * 2^(n-1), capped at max_delay
+      full          uniform(0, that)                      — spreads retries evenly
+      decorrelated  uniform(base, previous_delay * 3), capped
+    """
+    max_attempts: int = 3
+    base_delay: float = 60.0
+    max_delay: float = 3600.0
+    jitter: str = "full"
+    retry_on: tuple = (DISPATCH,)
+
+    @classmethod
+    def from_env(cls):
+        base = float(os.getenv("RETRY_DELAY", "60"))
+        backoff = os.getenv("RETRY_BACKOFF", "true").lower() in ("1", "true", "yes")
+        return cls(
+            max_attempts=int(os.getenv("TASK_MAX_RETRIES", "3")),
+            base_delay=base,
+            # No backoff == every delay is the base delay
+            max_delay=float(os.getenv("RETRY_MAX_DELAY", "3600")) if backoff else base,
+            jitter=os.getenv("RETRY_JITTER", "full"),
+            retry_on=tuple(os.getenv("RETRY_ON", DISPATCH).split(",")),
+        )
+
+    def merged(self, overrides: Optional[dict]):
+        """Copy of this policy with per-task overrides (as stored on Task.retry_policy)."""
+        if not overrides:
+            return self
+        known = {f.name for f in fields(self)}
+        values = asdict(self)
+        values.update({k: v for k, v in overrides.items() if k in known and v is not None})
+        values["retry_on"] = tuple(values["retry_on"])
+        return RetryPolicy(**values)
+
+    def should_retry(self, kind: str, failures: int) -> bool:
+        return kind in self.retry_on and failures < self.max_attempts
+
+    def next_delay(self, failures: int, previous_delay: Optional[float] = None) -> float:
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (failures - 1)))
+        if self.jitter == "full":
+            return random.uniform(0, ceiling)
+        if self.jitter == "decorrelated":
+            prev = previous_delay or self.base_delay
+            return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, prev * 3)))
+        return ceiling
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy.from_env()
+
+
+def policy_for(task) -> RetryPolicy:
+    return DEFAULT_RETRY_POLICY.merged(task.retry_policy)
+
+
+def apply_failure(task, kind: str) -> Optional[float]:
+    """
+    Record a failed attempt on a Task row.
+    Moves it to "retrying" (returns the delay) or to "failed" (returns None).
+    The caller commits.
+    """
+    now = datetime.now(timezone.utc)
+    policy = policy_for(task)
+    task.retry_count = (task.retry_count or 0) + 1
+
+    if policy.should_retry(kind, task.retry_count):
+        delay = policy.next_delay(task.retry_count, task.last_retry_delay)
+        task.last_retry_delay = delay
+        task.retry_at = now + timedelta(seconds=delay)
+        task.status = "retrying"
+        return delay
+
+    task.status = "failed"
+    task.failed_at = now
+    return None
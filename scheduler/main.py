@@ -1,9 +1,21 @@
-from fastapi import FastAPI
+from utils.config import load_env, get_settings
+
+# .env first: the modules below read their knobs at import time
+load_env()
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .api.routes import router as task_router
 
 from utils.logger import setup_logger
+from utils.tracing import configure_tracing
+from utils import profiling
 from scheduler.services.db import init_models
+from scheduler.services import notify
+from scheduler.core.cache import on_task_event, on_worker_event
+from scheduler.core.hub import task_hub
+import asyncio
 
 # from fastapi import Request
 from slowapi.middleware import SlowAPIMiddleware
@@ -13,6 +25,8 @@ from scheduler.core.limiter import limiter, rate_limit_handler
 
 
 logger = setup_logger("Scheduler")
+configure_tracing("Scheduler")
+profiling.enable_profiling("Scheduler")
 
 # Initialize FastAPI app
 app = FastAPI(title="PyTaskFlow Scheduler")
@@ -25,45 +39,7 @@ app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
 
 
 # Enable CORS
-from typing import Optional
-from pydantic_settings import BaseSettings, SettingsConfigDict
-
-class AppSettings(BaseSettings):
-    # Basic web config
-    ALLOWED_ORIGINS: str = "*"      # keep "*" for local/dev; override in Render
-    ALLOW_CREDENTIALS: bool = False
-
-    # Database (common env name)
-    DATABASE_URL: Optional[str] = None
-
-    # Worker / coordinator / grpc / heartbeat config
-    worker_name: Optional[str] = None
-    worker_host: Optional[str] = None
-    worker_port: Optional[int] = None
-    worker_heartbeat_interval: Optional[int] = None
-
-    coordinator_host: Optional[str] = None
-    coordinator_grpc_port: Optional[int] = None
-    coordinator_heartbeat_port: Optional[int] = None
-
-    # General scheduler options
-    heartbeat_port: Optional[int] = None
-    heartbeat_timeout: Optional[int] = None
-    check_interval: Optional[int] = None
-    task_max_retries: Optional[int] = None
-    dispatch_network_retries: Optional[int] = None
-    retry_delay: Optional[int] = None
-    retry_backoff: Optional[bool] = None
-
-    # Combined config: env_file + ignore unknown env vars
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        extra="ignore",   # ignore unknown env vars instead of raising
-    )
-
-# instantiate settings
-app_settings = AppSettings()
+app_settings = get_settings()
 
 # build origins list from env (support "*" or comma-separated list)
 if app_settings.ALLOWED_ORIGINS.strip() == "*" or not app_settings.ALLOWED_ORIGINS:
@@ -94,8 +70,40 @@ async def health_check():
     return {"status": "ok", "service": "Scheduler"}
 
 
+# Profiling (PROFILE_ENABLED=1 only; 404 otherwise)
+@app.get("/api/debug/stages")
+async def debug_stages():
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling disabled")
+    return profiling.snapshot()
+
+
+@app.get("/api/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(seconds: float = Query(5, gt=0, le=60)):
+    """Sample the event loop for `seconds`; returns collapsed stacks for flamegraph.pl/speedscope."""
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling disabled")
+    return await asyncio.to_thread(profiling.sample_stacks, seconds)
+
+
 # Startup event - create DB tables
 @app.on_event("startup")
 async def startup_event():
     logger.info("Initializing database tables 🗄️")
     await init_models()
+
+    # Invalidate cached status/worker reads on state-change notifications
+    notify.subscribe(notify.TASK_CHANNEL, on_task_event)
+    notify.subscribe(notify.WORKER_CHANNEL, on_worker_event)
+    # Wake long-poll waiters (after the cache entry has been dropped)
+    notify.subscribe(notify.TASK_CHANNEL, task_hub.on_task_event)
+    app.state.notify_listener = asyncio.create_task(notify.listen_forever())
+    app.state.loop_monitor = asyncio.create_task(profiling.monitor_event_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for name in ("notify_listener", "loop_monitor"):
+        background = getattr(app.state, name, None)
+        if background:
+            background.cancel()
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, BigInteger, Boolean, Integer, String, DateTime, Float, JSON
 from .services.db import Base
 
 
@@ -9,7 +9,8 @@ from .services.db import Base
 class Task(Base):
     __tablename__ = "tasks"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # BIGINT (matches int64 ids on the wire); SQLite only autoincrements INTEGER
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True)
     command = Column(String, nullable=False)
 
     # ✅ timezone-aware scheduling timestamp
@@ -27,6 +28,14 @@ class Task(Base):
     # ✅ retry tracking
     retry_at = Column(DateTime(timezone=True))
     retry_count = Column(Integer, default=0)
+    last_retry_delay = Column(Float)
+    # per-task RetryPolicy overrides (None = service defaults)
+    retry_policy = Column(JSON)
+    # ResourceRequest: cpu / memory_mb / named (None = service defaults)
+    resources = Column(JSON)
+
+    # W3C traceparent of the request that created the task
+    trace_parent = Column(String)
 
 
 # ======================================
@@ -37,5 +46,30 @@ class Worker(Base):
 
     id = Column(Integer, primary_key=True)
     hostname = Column(String, unique=True)
+    address = Column(String)    # host:port of the worker's gRPC server
     last_heartbeat = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    status = Column(String, default="alive")
+    status = Column(String, default="alive")    # alive / draining / dead
+    capacity = Column(JSON)     # resources detected at worker startup
+
+
+# ======================================
+# 🧩 Coordinator Leases — shard membership
+# ======================================
+class CoordinatorLease(Base):
+    __tablename__ = "coordinator_leases"
+
+    shard_id = Column(String, primary_key=True)
+    acquired_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+# ======================================
+# 🪣 Rate-limit Buckets — shared tenant quotas
+# ======================================
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)     # tenant name, token hash or client IP
+    tokens = Column(Float, nullable=False)
+    allowed = Column(Boolean, nullable=False)  # outcome of the last take
+    updated_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,11 +1,16 @@
 # scheduler/services/db.py
+import atexit
+import json
 import os
+import time
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
+from utils.config import load_env
+from utils import profiling
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Read variables from .env
 POSTGRES_USER = os.getenv("POSTGRES_USER")
@@ -16,23 +21,139 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
 
 POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 
-# Build DATABASE_URL dynamically
-DATABASE_URL = (
+# Build DATABASE_URL dynamically (an explicit DATABASE_URL wins, e.g.
+# sqlite+aiosqlite:///bench.db for the local benchmark stand-in)
+DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@"
     f"{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
+# "postgresql" / "sqlite", known without creating the engine
+DIALECT = DATABASE_URL.split(":", 1)[0].split("+", 1)[0]
 
-# Create async SQLAlchemy engine and session factory
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
-AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 Base = declarative_base()
 
+# Optional DB round-trip counter (used by benchmarks/load_test.py)
+DB_STATS_FILE = os.getenv("DB_STATS_FILE")
+
+_engine = None
+_session_factory = None
+
+
+def get_engine():
+    """The process-wide async engine, created on first use (not at import)."""
+    global _engine, _session_factory
+    if _engine is not None:
+        return _engine
+
+    if DIALECT == "sqlite":
+        # Several services share one file: wait for locks instead of failing
+        engine = create_async_engine(DATABASE_URL, echo=False, future=True, connect_args={"timeout": 30})
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _sqlite_pragmas(dbapi_conn, _):
+            cursor = dbapi_conn.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.close()
+    else:
+        engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    if DB_STATS_FILE:
+        _count_round_trips(engine)
+    if profiling.ENABLED:
+        _time_statements(engine)
+
+    _engine = engine
+    _session_factory = sessionmaker(
+        engine, expire_on_commit=False, class_=_TimedSession if profiling.ENABLED else AsyncSession,
+    )
+    return engine
+
+
+def AsyncSessionLocal(**kwargs):
+    """New AsyncSession (same call as the sessionmaker it replaces)."""
+    if _session_factory is None:
+        get_engine()
+    return _session_factory(**kwargs)
+
+
+async def dispose_engine():
+    """Close pooled connections on shutdown; nothing to do if the DB was never used."""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = _session_factory = None
+
+
+def _count_round_trips(engine):
+    _db_stats = {"statements": 0, "commits": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count_statement(*_):
+        _db_stats["statements"] += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def _count_commit(*_):
+        _db_stats["commits"] += 1
+
+    @atexit.register
+    def _write_db_stats():
+        with open(DB_STATS_FILE, "w") as f:
+            json.dump(_db_stats, f)
+
+
+def _time_statements(engine):
+    """Profiling: every statement's database time under the "db.execute" stage."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        context._profile_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        profiling.record("db.execute", time.perf_counter() - context._profile_started)
+
+
+class _TimedSession(AsyncSession):
+    """Profiling: commits (flush included) under the "db.commit" stage."""
+
+    async def commit(self):
+        with profiling.stage_timer("db.commit"):
+            await super().commit()
+
+
 # Dependency to get DB session (used in FastAPI routes)
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
-# Create tables on startup
+# Columns added since the first release. create_all() only creates missing
+# tables and never alters existing ones, so an upgraded Postgres deployment
+# gets them here; every statement is idempotent and runs on each startup.
+# (The SQLite stand-in is always created fresh.)
+SCHEMA_UPGRADES = [
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS last_retry_delay DOUBLE PRECISION",
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS retry_policy JSON",
+    "ALTER TABLE workers ADD COLUMN IF NOT EXISTS address VARCHAR",
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS trace_parent VARCHAR",
+    # int64 ids on the wire: widen the key and its sequence once (a no-op afterwards)
+    """
+    DO $$
+    BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'tasks' AND column_name = 'id') = 'integer' THEN
+            ALTER TABLE tasks ALTER COLUMN id TYPE BIGINT;
+            ALTER SEQUENCE IF EXISTS tasks_id_seq AS BIGINT;
+        END IF;
+    END $$
+    """,
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS resources JSON",
+    "ALTER TABLE workers ADD COLUMN IF NOT EXISTS capacity JSON",
+]
+
+
+# Create tables on startup, then bring existing ones up to date
 async def init_models():
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        if DIALECT == "postgresql":
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
@@ -0,0 +1,108 @@
+# scheduler/services/notify.py
+"""
+Cross-process state-change notifications (Postgres LISTEN/NOTIFY).
+
+The coordinator and workers publish a small JSON payload whenever a task or
+worker changes state. The scheduler keeps one listening connection open and
+fans events out to in-process subscribers (e.g. the status cache).
+"""
+import asyncio
+import json
+
+import asyncpg
+from sqlalchemy import text
+
+from .db import DATABASE_URL, DIALECT
+from utils.logger import setup_logger
+
+logger = setup_logger("Notify")
+
+TASK_CHANNEL = "task_events"
+WORKER_CHANNEL = "worker_events"
+
+RECONNECT_DELAY = 5  # seconds between listener reconnect attempts
+
+# Only Postgres has LISTEN/NOTIFY; elsewhere (SQLite stand-in) readers fall
+# back to cache TTLs and nothing is published.
+ENABLED = DIALECT == "postgresql"
+
+# channel -> list of callbacks(payload: dict | None)
+# A payload of None means "events may have been missed; drop everything".
+_subscribers = {TASK_CHANNEL: [], WORKER_CHANNEL: []}
+
+
+def subscribe(channel: str, callback):
+    """Register a callback for events published on `channel`."""
+    _subscribers[channel].append(callback)
+
+
+def _dispatch(channel: str, payload):
+    for callback in _subscribers.get(channel, []):
+        try:
+            callback(payload)
+        except Exception as e:
+            logger.warning(f"⚠️ Subscriber for {channel} failed: {e}")
+
+
+# ======================================
+# 📣 Publishing (inside the writer's transaction)
+# ======================================
+async def _publish(session, channel: str, payload: dict):
+    if not ENABLED:
+        return
+    # pg_notify is transactional: the event is delivered on commit.
+    await session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": json.dumps(payload)},
+    )
+
+
+async def publish_task_event(session, task_id: int, status: str):
+    """Announce a task status change; call before session.commit()."""
+    await _publish(session, TASK_CHANNEL, {"id": task_id, "status": status})
+
+
+async def publish_worker_event(session, hostname: str, status: str):
+    """Announce a worker registration or status change; call before commit."""
+    await _publish(session, WORKER_CHANNEL, {"hostname": hostname, "status": status})
+
+
+# ======================================
+# 👂 Listening (scheduler side)
+# ======================================
+def _on_notification(connection, pid, channel, payload):
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        data = None
+    _dispatch(channel, data)
+
+
+async def listen_forever():
+    """Keep a LISTEN connection open, reconnecting if it drops."""
+    if not ENABLED:
+        logger.info("Notifications unavailable on this database; relying on cache TTLs.")
+        return
+    dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            for channel in _subscribers:
+                await conn.add_listener(channel, _on_notification)
+            # Anything published while we were disconnected is lost.
+            for channel in _subscribers:
+                _dispatch(channel, None)
+            logger.info("👂 Listening for task/worker state changes.")
+
+            while not conn.is_closed():
+                await asyncio.sleep(RECONNECT_DELAY)
+            logger.warning("⚠️ Notification connection closed; reconnecting.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Notification listener error: {e}")
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(RECONNECT_DELAY)
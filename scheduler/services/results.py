@@ -0,0 +1,54 @@
+# scheduler/services/results.py
+"""
+Writing task outcomes to the database.
+
+Workers record their own results (push mode) or send them in bulk to the
+coordinator with ReportResults (pull mode); both end up here, so a batch of
+results costs one SELECT ... IN and one commit instead of a session per task.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy.future import select
+
+from .db import AsyncSessionLocal
+from .notify import publish_task_event
+from scheduler.models import Task
+from scheduler.core.retry import apply_failure, EXECUTION
+
+FINAL_STATUSES = ("done", "failed")   # "requeued" results were already handed back
+
+
+def _timestamp(seconds: float):
+    return datetime.fromtimestamp(seconds, timezone.utc) if seconds else None
+
+
+async def record_results(results):
+    """
+    Apply TaskResponse results: "done" completes the task, "failed" goes through
+    the task's retry policy. Results for tasks that are no longer running
+    (handed back, or reported twice) are ignored.
+    Returns {task_id: status after the update}.
+    """
+    by_id = {r.id: r for r in results if r.status in FINAL_STATUSES}
+    if not by_id:
+        return {}
+
+    applied = {}
+    async with AsyncSessionLocal() as session:
+        rows = await session.execute(select(Task).where(Task.id.in_(list(by_id))))
+        for task in rows.scalars().all():
+            if task.status != "running":
+                continue
+            result = by_id[task.id]
+            if task.started_at is None:
+                task.started_at = _timestamp(result.started_at)
+            if result.status == "done":
+                task.status = "done"
+                task.completed_at = _timestamp(result.completed_at) or datetime.now(timezone.utc)
+            else:
+                # The task's retry policy decides: "retrying" or "failed"
+                apply_failure(task, EXECUTION)
+            applied[task.id] = task.status
+            await publish_task_event(session, task.id, task.status)
+        await session.commit()
+    return applied
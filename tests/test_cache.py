@@ -0,0 +1,32 @@
+"""TTLCache: expiry, and tombstones that keep a slow reader from restoring a stale row."""
+from scheduler.core.cache import TTLCache
+
+
+def test_invalidation_beats_a_read_that_started_before_it():
+    cache = TTLCache()
+    token = cache.token()          # reader starts its query...
+    cache.invalidate(1)            # ...the row changes meanwhile
+    cache.set(1, {"status": "running"}, token)
+    assert cache.get(1) is None
+
+    cache.set(1, {"status": "done"}, cache.token())
+    assert cache.get(1) == {"status": "done"}
+
+
+def test_clear_rejects_reads_started_before_it():
+    cache = TTLCache()
+    token = cache.token()
+    cache.clear()
+    cache.set(1, "stale", token)
+    assert cache.get(1) is None
+
+
+def test_entries_expire_and_size_is_bounded():
+    cache = TTLCache(maxsize=2, ttl=0)
+    cache.set(1, "a")
+    assert cache.get(1) is None
+
+    cache = TTLCache(maxsize=2, ttl=60)
+    for key in (1, 2, 3):
+        cache.set(key, key)
+    assert cache.get(1) is None and cache.get(3) == 3
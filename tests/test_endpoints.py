@@ -0,0 +1,59 @@
+"""Push-mode endpoint health: circuit breaker states, AIMD limits and placement."""
+from coordinator import endpoints
+from coordinator.endpoints import AIMDLimit, CircuitBreaker, EndpointPool, CLOSED, HALF_OPEN, OPEN
+from scheduler.core.resources import Resources
+
+
+def _trip(breaker):
+    for _ in range(endpoints.BREAKER_CONSECUTIVE_FAILURES):
+        breaker.record_failure()
+
+
+def test_breaker_opens_then_a_half_open_success_closes_it(monkeypatch):
+    breaker = CircuitBreaker("w")
+    _trip(breaker)
+    assert breaker.current_state() == OPEN
+
+    monkeypatch.setattr(endpoints, "BREAKER_COOLDOWN", 0)
+    assert breaker.current_state() == HALF_OPEN
+    breaker.record_success()
+    assert breaker.current_state() == CLOSED
+
+
+def test_half_open_failure_reopens(monkeypatch):
+    breaker = CircuitBreaker("w")
+    _trip(breaker)
+    monkeypatch.setattr(endpoints, "BREAKER_COOLDOWN", 0)
+    assert breaker.current_state() == HALF_OPEN
+    monkeypatch.setattr(endpoints, "BREAKER_COOLDOWN", 60)
+    breaker.record_failure()
+    assert breaker.current_state() == OPEN
+
+
+def test_aimd_grows_slowly_and_halves_on_errors():
+    limit = AIMDLimit()
+    start = limit.limit
+    limit.on_success()
+    assert start < limit.limit < start + 1
+    limit.on_failure()
+    assert limit.limit == (start + 1 / start) * endpoints.CONCURRENCY_BACKOFF
+    for _ in range(10):
+        limit.on_failure()
+    assert limit.current == endpoints.CONCURRENCY_MIN
+
+
+def test_fractional_cpu_worker_takes_default_tasks_only():
+    pool = EndpointPool(["w:1"])
+    pool.endpoints["w:1"].capacity = Resources(cpu=0.5, memory_mb=1024)
+    accept = pool.planner()
+    assert not accept(Resources.for_task({"cpu": 1}))
+    assert accept(Resources.for_task(None))
+
+
+def test_reservations_survive_a_capacity_report_mid_dispatch():
+    pool = EndpointPool(["w:1"])
+    ep = pool.acquire(Resources.for_task(None))       # capacity unknown: 1 cpu held
+    ep.capacity = Resources(cpu=0.5, memory_mb=1024)  # first heartbeat arrives
+    assert ep.available().cpu == 0
+    pool.release(ep, True, Resources.for_task(None))
+    assert ep.available() == Resources(cpu=0.5, memory_mb=1024)
@@ -0,0 +1,68 @@
+"""Rate-limit keys and tenant quotas: unknown API tokens must not buy fresh buckets."""
+import asyncio
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from scheduler.core import limiter, quotas
+
+
+def _request(headers=None, peer="203.0.113.7"):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "headers": raw, "client": (peer, 1234)})
+
+
+def _app():
+    app = FastAPI()
+
+    @app.post("/schedule", dependencies=[Depends(quotas.enforce_quota)])
+    async def schedule():
+        return {"ok": True}
+
+    return app
+
+
+def test_unknown_tokens_are_keyed_on_client_address(monkeypatch):
+    monkeypatch.setattr(limiter, "API_TENANTS", {"tok_acme": "acme"})
+    keys = {limiter.client_key(_request({"Authorization": f"Bearer random-{i}"})) for i in range(5)}
+    assert keys == {"ip:203.0.113.7"}
+    assert limiter.client_key(_request({"X-API-Key": "tok_acme"})).startswith("token:")
+
+
+def test_rotating_tokens_from_one_ip_still_get_429(monkeypatch):
+    monkeypatch.setattr(limiter, "API_TENANTS", {})
+    monkeypatch.setattr(quotas, "QUOTAS", {"default": quotas.Quota(rate=0.001, burst=3)})
+    monkeypatch.setattr(quotas, "store", quotas.MemoryBucketStore())
+    client = TestClient(_app())
+
+    codes = [
+        client.post("/schedule", headers={"Authorization": f"Bearer random-{i}"}).status_code
+        for i in range(5)
+    ]
+    assert codes == [200, 200, 200, 429, 429]
+
+
+def test_known_token_gets_its_tenant_bucket(monkeypatch):
+    monkeypatch.setattr(limiter, "API_TENANTS", {"tok_acme": "acme"})
+    monkeypatch.setattr(quotas, "API_TENANTS", limiter.API_TENANTS)
+    assert quotas.tenant_for(_request({"X-API-Key": "tok_acme"})) == "acme"
+    assert quotas.tenant_for(_request({"X-API-Key": "tok_other"})) == "ip:203.0.113.7"
+
+
+def test_memory_store_is_capped():
+    store = quotas.MemoryBucketStore(max_buckets=100)
+    quota = quotas.Quota(rate=0.001, burst=5)
+
+    async def fill():
+        for i in range(1000):
+            await store.take(f"ip:10.0.{i // 256}.{i % 256}", quota)
+
+    asyncio.run(fill())
+    assert len(store) <= 100
+
+
+def test_refill_horizon_is_the_slowest_quota():
+    assert quotas.refill_horizon({"default": quotas.Quota(2, 20), "acme": quotas.Quota(50, 200)}) == 10
+    assert quotas.refill_horizon({"default": quotas.Quota(0, 5)}) is None
+    assert quotas.refill_horizon({}) is None
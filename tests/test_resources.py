@@ -0,0 +1,57 @@
+"""Worker resource pool: FIFO grants and tasks sized for fractional CPU quotas."""
+import asyncio
+
+import pytest
+
+from scheduler.core.resources import Resources
+from worker.resources import ResourceNeverFits, ResourcePool
+
+
+def test_a_large_waiting_task_is_not_overtaken():
+    async def run():
+        pool = ResourcePool(Resources(cpu=4))
+        await pool.acquire(Resources(cpu=3))
+        granted = []
+
+        async def take(name, cpu):
+            await pool.acquire(Resources(cpu=cpu))
+            granted.append(name)
+
+        big = asyncio.create_task(take("big", 4))
+        await asyncio.sleep(0)
+        small = asyncio.create_task(take("small", 1))   # would fit now, but queues behind "big"
+        await asyncio.sleep(0)
+        assert granted == []
+
+        pool.release(Resources(cpu=3))
+        await big
+        assert granted == ["big"]
+        pool.release(Resources(cpu=4))
+        await small
+        assert granted == ["big", "small"]
+
+    asyncio.run(run())
+
+
+def test_fractional_quota_runs_default_tasks_and_rejects_big_requests():
+    capacity = Resources(cpu=0.5, memory_mb=512)
+
+    async def run():
+        pool = ResourcePool(capacity)
+        need = Resources.for_task(None).fitted(capacity)
+        assert need.cpu == 0.5
+        await pool.acquire(need)
+        pool.release(need)
+        with pytest.raises(ResourceNeverFits):
+            await pool.acquire(Resources.for_task({"cpu": 1}).fitted(capacity))
+
+    asyncio.run(run())
+
+
+def test_default_cpu_survives_the_task_request_round_trip():
+    from proto import task_pb2
+
+    sent = task_pb2.Resources(**Resources.for_task({"memory_mb": 64}).request_fields())
+    received = Resources.for_request(sent)
+    assert received.default_cpu and received.fitted(Resources(cpu=0.25)).cpu == 0.25
+    assert not Resources.for_request(task_pb2.Resources(cpu=2)).default_cpu
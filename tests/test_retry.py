@@ -0,0 +1,69 @@
+"""Retry policies: backoff ceilings, jitter bounds and which failures are retried."""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from scheduler.core import retry
+from scheduler.core.retry import DISPATCH, EXECUTION, RetryPolicy
+
+
+def _task(**kw):
+    fields = {"retry_count": 0, "last_retry_delay": None, "retry_policy": None, "status": "running"}
+    fields.update(kw)
+    return SimpleNamespace(**fields)
+
+
+def test_no_jitter_doubles_up_to_the_cap():
+    policy = RetryPolicy(base_delay=10, max_delay=50, jitter="none")
+    assert [policy.next_delay(n) for n in range(1, 5)] == [10, 20, 40, 50]
+
+
+@pytest.mark.parametrize("failures", [1, 2, 3, 8])
+def test_full_jitter_stays_under_the_ceiling(failures):
+    random.seed(failures)
+    policy = RetryPolicy(base_delay=10, max_delay=60, jitter="full")
+    ceiling = min(60, 10 * 2 ** (failures - 1))
+    delays = [policy.next_delay(failures) for _ in range(200)]
+    assert all(0 <= d <= ceiling for d in delays)
+
+
+def test_decorrelated_jitter_stays_between_base_and_cap():
+    random.seed(1)
+    policy = RetryPolicy(base_delay=5, max_delay=40, jitter="decorrelated")
+    previous = None
+    for failures in range(1, 50):
+        previous = policy.next_delay(failures, previous)
+        assert 5 <= previous <= 40
+
+
+def test_retry_on_selects_failure_kinds():
+    policy = RetryPolicy(max_attempts=3, retry_on=(DISPATCH,))
+    assert policy.should_retry(DISPATCH, 1)
+    assert not policy.should_retry(EXECUTION, 1)
+    assert not policy.should_retry(DISPATCH, 3)
+    assert policy.merged({"retry_on": [DISPATCH, EXECUTION]}).should_retry(EXECUTION, 1)
+
+
+def test_merged_ignores_unknown_and_null_overrides():
+    policy = RetryPolicy(max_attempts=3).merged({"max_attempts": None, "bogus": 1, "base_delay": 2})
+    assert policy.max_attempts == 3 and policy.base_delay == 2
+
+
+def test_apply_failure_schedules_a_retry_then_fails(monkeypatch):
+    monkeypatch.setattr(retry, "DEFAULT_RETRY_POLICY", RetryPolicy(max_attempts=2, base_delay=7, jitter="none"))
+    task = _task()
+
+    assert retry.apply_failure(task, DISPATCH) == 7
+    assert task.status == "retrying" and task.retry_count == 1 and task.last_retry_delay == 7
+    assert task.retry_at is not None
+
+    assert retry.apply_failure(task, DISPATCH) is None
+    assert task.status == "failed" and task.failed_at is not None
+
+
+def test_apply_failure_honours_the_task_policy(monkeypatch):
+    monkeypatch.setattr(retry, "DEFAULT_RETRY_POLICY", RetryPolicy(retry_on=(DISPATCH,)))
+    assert retry.apply_failure(_task(), EXECUTION) is None
+    task = _task(retry_policy={"retry_on": [EXECUTION], "jitter": "none", "base_delay": 1})
+    assert retry.apply_failure(task, EXECUTION) == 1
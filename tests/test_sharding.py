@@ -0,0 +1,21 @@
+"""Consistent-hash bucket ownership across coordinator shards."""
+from coordinator.sharding import BUCKETS, HashRing
+
+
+def test_buckets_are_partitioned_between_shards():
+    ring = HashRing(["a", "b", "c"])
+    owned = [ring.buckets_for(s) for s in ("a", "b", "c")]
+    assert sum(len(o) for o in owned) == BUCKETS
+    assert frozenset().union(*owned) == frozenset(range(BUCKETS))
+    assert all(owned)
+
+
+def test_a_joining_shard_only_takes_buckets_over():
+    before = HashRing(["a", "b"])
+    after = HashRing(["a", "b", "c"])
+    for shard in ("a", "b"):
+        assert after.buckets_for(shard) <= before.buckets_for(shard)
+
+
+def test_empty_ring_owns_nothing():
+    assert HashRing([]).owner(0) is None
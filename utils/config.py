@@ -0,0 +1,39 @@
+"""
+One place to load configuration, cheaply and once.
+
+    load_env()       read .env into os.environ (repo root, then the working
+                     directory; real environment variables win). Services call
+                     it first thing, before modules read their os.getenv knobs.
+    get_settings()   the scheduler's typed AppSettings (utils/settings.py),
+                     built on first use
+
+Both are lazy on purpose: python-dotenv is only imported when a .env file
+exists, and pydantic-settings only when something asks for settings, so a
+worker pod configured purely through its environment starts without either.
+"""
+import os
+from functools import lru_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_env_loaded = False
+
+
+def load_env():
+    """Load .env once per process; later calls are free."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    for directory in dict.fromkeys((ROOT, os.getcwd())):
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+
+
+@lru_cache(maxsize=1)
+def get_settings():
+    from utils.settings import AppSettings
+    load_env()
+    return AppSettings()
@@ -0,0 +1,44 @@
+"""
+Shared gRPC server/channel settings for the coordinator and workers.
+
+    GRPC_COMPRESSION=gzip             compress messages (commands/outputs compress well)
+    GRPC_KEEPALIVE_TIME_MS=30000      ping idle connections this often...
+    GRPC_KEEPALIVE_TIMEOUT_MS=10000   ...and drop them when a ping goes unanswered
+
+Keepalive lets long-lived channels (pull streams, per-worker dispatch channels)
+notice dead peers and NAT timeouts instead of hanging on a half-open socket.
+"""
+import os
+
+import grpc
+
+COMPRESSION = (
+    grpc.Compression.Gzip
+    if os.getenv("GRPC_COMPRESSION", "").lower() == "gzip"
+    else grpc.Compression.NoCompression
+)
+KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "30000"))
+KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))
+
+_KEEPALIVE = [
+    ("grpc.keepalive_time_ms", KEEPALIVE_TIME_MS),
+    ("grpc.keepalive_timeout_ms", KEEPALIVE_TIMEOUT_MS),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+def server():
+    """grpc.aio server that accepts our clients' keepalive pings."""
+    return grpc.aio.server(
+        compression=COMPRESSION,
+        options=_KEEPALIVE + [
+            # Default is 5 minutes; pings more frequent than that would get the
+            # connection closed with ENHANCE_YOUR_CALM.
+            ("grpc.http2.min_ping_interval_without_data_ms", KEEPALIVE_TIME_MS),
+        ],
+    )
+
+
+def insecure_channel(target: str):
+    return grpc.aio.insecure_channel(target, options=_KEEPALIVE, compression=COMPRESSION)
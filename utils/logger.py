@@ -1,15 +1,79 @@
+import atexit
+import json
 import logging
-import structlog
-from colorlog import ColoredFormatter
+import logging.handlers
+import os
+import queue
 
-def setup_logger(service_name: str):
+# ======================================
+# Environment knobs
+#   LOG_LEVEL=INFO                 default level for every service
+#   LOG_LEVEL_<SERVICE>=DEBUG      per-service override, e.g. LOG_LEVEL_COORDINATOR
+#   LOG_FORMAT=color|json          console colors (default) or one JSON object per line
+#   LOG_ASYNC=1                    format + write on a listener thread, not the event loop
+#   LOG_TASK_SAMPLE_RATE=0.1       keep INFO lines for ~10% of tasks (lines logged
+#                                  with extra={"task_id": ...}); warnings always kept
+#
+# colorlog and structlog are imported when first needed: they are a visible
+# share of a worker's cold start.
+# ======================================
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_queue = None            # shared by all loggers when LOG_ASYNC is on
+_listener = None
+_structlog_configured = False
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included as keys."""
+
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "service": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class TaskSampler(logging.Filter):
     """
-    Configure a structured, colored logger for each service.
-    Usage:
-        logger = setup_logger("Scheduler")
+    Keep INFO-and-below records tagged with a task_id for a fixed fraction of
+    tasks. The decision is a hash of the id, so a sampled task keeps all of
+    its lines across services.
     """
-    # Define colored log format
-    formatter = ColoredFormatter(
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.threshold = int(rate * 2**32)
+
+    def filter(self, record):
+        task_id = getattr(record, "task_id", None)
+        if task_id is None or record.levelno > logging.INFO:
+            return True
+        return (int(task_id) * 2654435761) % 2**32 < self.threshold
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    # The stock QueueHandler formats the message on the calling thread;
+    # hand the raw record over so formatting happens on the listener thread.
+    def prepare(self, record):
+        return record
+
+
+def _formatter():
+    if os.getenv("LOG_FORMAT", "color").lower() == "json":
+        return JSONFormatter()
+    from colorlog import ColoredFormatter
+    return ColoredFormatter(
         "%(log_color)s[%(asctime)s] [%(name)s] [%(levelname)s] → %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
         log_colors={
@@ -21,26 +85,78 @@ def setup_logger(service_name: str):
         },
     )
 
-    # Stream logs to console
-    handler = logging.StreamHandler()
-    handler.setFormatter(formatter)
 
-    # Create logger
-    logger = logging.getLogger(service_name)
-    logger.addHandler(handler)
-    logger.setLevel(logging.INFO)
-    logger.propagate = False
+def _make_handler():
+    global _queue, _listener
 
-    # Structlog configuration
+    stream = logging.StreamHandler()
+    stream.setFormatter(_formatter())
+    if os.getenv("LOG_ASYNC", "").lower() not in ("1", "true", "yes"):
+        return stream
+
+    if _listener is None:
+        _queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(_queue, stream)
+        _listener.start()
+        atexit.register(_listener.stop)   # drains queued records on exit
+    return _LazyQueueHandler(_queue)
+
+
+def _level_for(service_name: str) -> int:
+    key = "LOG_LEVEL_" + service_name.upper().replace("-", "_")
+    level = logging.getLevelName((os.getenv(key) or os.getenv("LOG_LEVEL", "INFO")).upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+def _configure_structlog(level: int):
+    global _structlog_configured
+    if _structlog_configured:
+        return
+    import structlog
+    if os.getenv("LOG_FORMAT", "color").lower() == "json":
+        renderer = structlog.processors.JSONRenderer()
+    else:
+        renderer = structlog.dev.ConsoleRenderer(colors=True)
     structlog.configure(
         processors=[
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.add_log_level,
-            structlog.dev.ConsoleRenderer(colors=True),
+            renderer,
         ],
-        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
+    _structlog_configured = True
 
+
+def setup_logger(service_name: str):
+    """
+    Configure a structured, colored logger for each service.
+    Safe to call repeatedly: the logger is only configured once.
+    Usage:
+        logger = setup_logger("Scheduler")
+        logger.info("✅ Task %s done", task_id, extra={"task_id": task_id})
+    """
+    logger = logging.getLogger(service_name)
+    if getattr(logger, "_pytaskflow_configured", False):
+        return logger
+
+    handler = _make_handler()
+    rate = float(os.getenv("LOG_TASK_SAMPLE_RATE", "1"))
+    if rate < 1:
+        handler.addFilter(TaskSampler(rate))
+
+    level = _level_for(service_name)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    logger._pytaskflow_configured = True
     return logger
+
+
+def get_struct_logger(service_name: str):
+    """structlog logger for a service; structlog is configured on the first call."""
+    import structlog
+    _configure_structlog(_level_for(service_name))
+    return structlog.get_logger(service_name)
@@ -0,0 +1,191 @@
+"""
+Opt-in runtime instrumentation for the scheduler, coordinator and worker.
+
+    PROFILE_ENABLED=1              turn everything below on (off = no-ops)
+    PROFILE_LOOP_INTERVAL=0.5      seconds between event-loop lag probes
+    PROFILE_LAG_WARN_MS=100        log when the loop is this late
+    PROFILE_SLOW_CALLBACK_MS=50    log callbacks/coroutine steps slower than this
+    PROFILE_REPORT_INTERVAL=60     seconds between stage-timer summaries in the log
+    PROFILE_DIR=/tmp               where SIGUSR1 writes sampled profiles
+    PROFILE_SIGNAL_SECONDS=10      how long a SIGUSR1 profile samples for
+
+Sampled profiles are "collapsed stack" text (frame;frame;frame count), which
+flamegraph.pl, speedscope and inferno read directly.
+"""
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+
+from utils.logger import setup_logger
+
+logger = setup_logger("Profiling")
+
+ENABLED = os.getenv("PROFILE_ENABLED", "").lower() in ("1", "true", "yes")
+LOOP_INTERVAL = float(os.getenv("PROFILE_LOOP_INTERVAL", "0.5"))
+LAG_WARN = float(os.getenv("PROFILE_LAG_WARN_MS", "100")) / 1000
+SLOW_CALLBACK = float(os.getenv("PROFILE_SLOW_CALLBACK_MS", "50")) / 1000
+REPORT_INTERVAL = float(os.getenv("PROFILE_REPORT_INTERVAL", "60"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp")
+SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", "10"))
+
+SAMPLE_INTERVAL = 0.005   # seconds between stack samples
+RESERVOIR = 1024          # recent durations kept per stage for percentiles
+
+_NULL = nullcontext()
+_stages = {}              # name -> _StageStats
+_service = "pytaskflow"
+_loop_thread_id = None
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RESERVOIR)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def summary(self):
+        recent = sorted(self.recent)
+        pick = lambda q: recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(pick(0.50) * 1000, 3),
+            "p99_ms": round(pick(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def record(stage: str, seconds: float):
+    stats = _stages.get(stage)
+    if stats is None:
+        stats = _stages[stage] = _StageStats()
+    stats.add(seconds)
+
+
+@contextmanager
+def _timed(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def stage_timer(stage: str):
+    """Time a block (sync or spanning awaits) under `stage`; free when disabled."""
+    return _timed(stage) if ENABLED else _NULL
+
+
+def snapshot():
+    return {name: stats.summary() for name, stats in sorted(_stages.items())}
+
+
+# ===============================
+#  Event loop: lag + slow callbacks
+# ===============================
+async def monitor_event_loop():
+    """Probe how late the loop wakes us up; also logs periodic stage summaries."""
+    global _loop_thread_id
+    if not ENABLED:
+        return
+    _loop_thread_id = threading.get_ident()   # the thread the profiler samples
+    loop = asyncio.get_running_loop()
+    next_report = loop.time() + REPORT_INTERVAL
+    while True:
+        expected = loop.time() + LOOP_INTERVAL
+        await asyncio.sleep(LOOP_INTERVAL)
+        lag = max(0.0, loop.time() - expected)
+        record("loop.lag", lag)
+        if lag > LAG_WARN:
+            logger.warning("🐢 Event loop lag %.1f ms", lag * 1000)
+        if loop.time() >= next_report:
+            logger.info("⏱️ Stage timings: %s", snapshot())
+            next_report = loop.time() + REPORT_INTERVAL
+
+
+def _install_slow_callback_detector():
+    # Wrap the loop's callback runner instead of enabling asyncio debug mode,
+    # which adds overhead to every call and task creation.
+    original = asyncio.events.Handle._run
+
+    def _run(handle):
+        started = time.perf_counter()
+        original(handle)
+        elapsed = time.perf_counter() - started
+        if elapsed > SLOW_CALLBACK:
+            record("loop.slow_callback", elapsed)
+            logger.warning("🐌 Slow callback %.1f ms: %r", elapsed * 1000, handle)
+
+    asyncio.events.Handle._run = _run
+
+
+# ===============================
+#  Sampling profiler
+# ===============================
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, thread_id: int = None) -> str:
+    """
+    Sample one thread's stack (default: the event loop thread) for `seconds`
+    and return collapsed stacks, hottest first. Blocking: run it in a thread.
+    """
+    target = thread_id or _loop_thread_id or threading.main_thread().ident
+    counts = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(target)
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        if stack:
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(SAMPLE_INTERVAL)
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+def _profile_to_file(seconds: float):
+    folded = sample_stacks(seconds)
+    path = os.path.join(PROFILE_DIR, f"profile-{_service}-{os.getpid()}-{int(time.time())}.folded")
+    with open(path, "w") as f:
+        f.write(folded)
+    logger.warning("🔥 Wrote %.1fs sampled profile to %s", seconds, path)
+
+
+def _on_profile_signal(signum, frame):
+    threading.Thread(target=_profile_to_file, args=(SIGNAL_SECONDS,), daemon=True).start()
+
+
+# ===============================
+#  Setup
+# ===============================
+def enable_profiling(service_name: str):
+    """
+    Call once at service start-up, from the main thread. Installs the
+    slow-callback detector and the SIGUSR1 profile trigger.
+    """
+    global _service
+    if not ENABLED:
+        return
+    _service = service_name.lower()
+    _install_slow_callback_detector()
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, _on_profile_signal)
+    logger.warning("⏱️ Profiling hooks enabled for %s (SIGUSR1 dumps a profile).", service_name)
@@ -0,0 +1,19 @@
+"""
+Typed scheduler web settings; see utils/config.get_settings() for the cached
+instance. Worker and coordinator knobs stay plain environment variables (read
+after load_env()), so a worker starts without pydantic-settings.
+"""
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class AppSettings(BaseSettings):
+    # Basic web config
+    ALLOWED_ORIGINS: str = "*"      # keep "*" for local/dev; override in Render
+    ALLOW_CREDENTIALS: bool = False
+
+    # Combined config: env_file + ignore unknown env vars
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",   # ignore unknown env vars instead of raising
+    )
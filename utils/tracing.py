@@ -0,0 +1,249 @@
+"""
+Minimal distributed tracing for PyTaskFlow.
+
+Trace context travels as a W3C `traceparent` string: stored on the task row
+by the scheduler, sent as gRPC metadata by the coordinator, and picked up by
+the worker. Finished spans are exported as OTLP/JSON, either appended to a
+file (TRACE_EXPORT_FILE, one ExportTraceServiceRequest per line) or POSTed to
+an OTLP/HTTP collector (OTEL_EXPORTER_OTLP_ENDPOINT, e.g. http://localhost:4318).
+
+With neither variable set every call here is a cheap no-op.
+
+Usage:
+    configure_tracing("Coordinator")
+    with start_span("dispatch", parent=task.trace_parent) as span:
+        metadata = [("traceparent", span.traceparent)]
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+logger = logging.getLogger("Tracing")
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL = 1.0     # seconds between background flushes
+
+_current = contextvars.ContextVar("pytaskflow_span", default=None)
+_exporter = None
+_TICK = object()          # exporter wake-up without a span
+
+
+class SpanContext:
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def parse(cls, traceparent):
+        """Parse a W3C traceparent header; None if missing or malformed."""
+        if not traceparent:
+            return None
+        parts = traceparent.split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        return cls(parts[1], parts[2])
+
+
+class Span:
+    def __init__(self, name: str, parent: SpanContext, kind: int, attributes: dict):
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.context = SpanContext(trace_id, secrets.token_hex(8))
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.error = None
+
+    @property
+    def traceparent(self) -> str:
+        return self.context.traceparent
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    traceparent = None
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+# ===============================
+#  Export
+# ===============================
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(name, context, parent_id, kind, start_ns, end_ns, attributes, error):
+    span = {
+        "traceId": context.trace_id,
+        "spanId": context.span_id,
+        "name": name,
+        "kind": kind,
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+        "status": {"code": 2, "message": error} if error else {"code": 1},
+    }
+    if parent_id:
+        span["parentSpanId"] = parent_id
+    return span
+
+
+class _Exporter:
+    """Batches finished spans on a background thread, off the event loop."""
+
+    def __init__(self, service_name: str, path: str = None, endpoint: str = None):
+        self.service_name = service_name
+        self.path = path
+        self.url = endpoint.rstrip("/") + "/v1/traces" if endpoint else None
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def submit(self, span: dict):
+        self._queue.put(span)
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + EXPORT_INTERVAL
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = _TICK
+            if item is None:
+                self._flush(batch)
+                return
+            if item is not _TICK:
+                batch.append(item)
+            if len(batch) >= EXPORT_BATCH_SIZE or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + EXPORT_INTERVAL
+
+    def _flush(self, spans):
+        if not spans:
+            return
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": self.service_name}},
+                ]},
+                "scopeSpans": [{"scope": {"name": "pytaskflow"}, "spans": spans}],
+            }]
+        }
+        body = json.dumps(payload, separators=(",", ":"))
+        try:
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(body + "\n")
+            if self.url:
+                req = urllib.request.Request(
+                    self.url, data=body.encode(), headers={"Content-Type": "application/json"}
+                )
+                urllib.request.urlopen(req, timeout=5).close()
+        except Exception as e:
+            logger.warning(f"⚠️ Dropped {len(spans)} span(s): {e}")
+
+
+# ===============================
+#  Public API
+# ===============================
+def configure_tracing(service_name: str):
+    """Enable span export for this process if TRACE_EXPORT_FILE / OTEL_EXPORTER_OTLP_ENDPOINT is set."""
+    global _exporter
+    path = os.getenv("TRACE_EXPORT_FILE")
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if _exporter is None and (path or endpoint):
+        _exporter = _Exporter(service_name, path=path, endpoint=endpoint)
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+@contextmanager
+def start_span(name: str, parent: str = None, kind: int = INTERNAL, attributes: dict = None):
+    """
+    Time a block as a span. `parent` is a traceparent string; without it the
+    span nests under the current span of this task/coroutine, if any.
+    """
+    if _exporter is None:
+        yield _NOOP
+        return
+
+    parent_ctx = SpanContext.parse(parent) or _current.get()
+    span = Span(name, parent_ctx, kind, attributes)
+    token = _current.set(span.context)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        _exporter.submit(_otlp_span(
+            span.name, span.context, span.parent_id, span.kind,
+            span.start_ns, time.time_ns(), span.attributes, span.error,
+        ))
+
+
+def record_span(name: str, start, end, parent: str = None, attributes: dict = None):
+    """Export a span for an interval that already happened (datetimes), e.g. queue wait."""
+    if _exporter is None or start is None or end is None:
+        return
+    parent_ctx = SpanContext.parse(parent) or _current.get()
+    trace_id = parent_ctx.trace_id if parent_ctx else secrets.token_hex(16)
+    _exporter.submit(_otlp_span(
+        name, SpanContext(trace_id, secrets.token_hex(8)),
+        parent_ctx.span_id if parent_ctx else None, INTERNAL,
+        int(start.timestamp() * 1e9), int(end.timestamp() * 1e9), attributes or {}, None,
+    ))
+
+
+def current_traceparent():
+    ctx = _current.get()
+    return ctx.traceparent if ctx else None
+
+
+def traceparent_from_grpc(context):
+    """Read the traceparent sent in gRPC invocation metadata."""
+    for key, value in context.invocation_metadata() or ():
+        if key == "traceparent":
+            return value
+    return None
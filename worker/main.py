@@ -1,38 +1,75 @@
+from utils.config import load_env
+
+# Load environment variables from .env (before the modules below read them)
+load_env()
+
 import asyncio
 import grpc
-import subprocess
+import signal
 import sys
 import os
 import socket
 from datetime import datetime, timezone
-from dotenv import load_dotenv
 import uuid
 
 from proto import task_pb2, task_pb2_grpc
 
 # import task_pb2, task_pb2_grpc
 
-# Load environment variables from .env
-load_dotenv()
-
 
 # Allow relative imports
 # sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from utils.logger import setup_logger
-from scheduler.services.db import AsyncSessionLocal
-from scheduler.models import Task
+from utils.tracing import configure_tracing, start_span, traceparent_from_grpc, SERVER
+from utils.profiling import enable_profiling, monitor_event_loop, stage_timer
+from utils import grpc_options
+from scheduler.core.resources import Resources
+from worker.resources import ResourcePool, ResourceNeverFits, detect_capacity, confine
+# Database access goes through worker.store, which imports SQLAlchemy lazily
+from worker import store
 
 logger = setup_logger("Worker")
+configure_tracing("Worker")
+enable_profiling("Worker")
 
-# Limit concurrent tasks (optional tuning)
-SEM = asyncio.Semaphore(3)
+# Tasks run while their resource requests fit in what this machine has
+CAPACITY = detect_capacity()
+POOL = ResourcePool(CAPACITY)
+DEFAULT_NEED = Resources.for_task(None).fitted(CAPACITY)
+SLOTS = max(1, int(CAPACITY.cpu // DEFAULT_NEED.cpu))     # default-sized tasks that fit
 
 # Coordinator heartbeat port
 # COORDINATOR_GRPC_PORT = 50052
 
 COORDINATOR_GRPC_PORT = int(os.getenv("COORDINATOR_GRPC_PORT", "50052"))
 
+# Graceful shutdown: how long SIGTERM waits for running tasks before handing them back
+DRAIN_TIMEOUT = int(os.getenv("WORKER_DRAIN_TIMEOUT", "30"))
+
+_draining = asyncio.Event()   # set on SIGTERM/SIGINT
+_running = {}                 # task_id -> subprocess currently executing it
+_evicted = set()              # task ids killed at the drain deadline
+_active = 0                   # ExecuteTask calls in progress (incl. waiting for a slot)
+
+# "push": serve ExecuteTask for the coordinator. "pull": no inbound port; open a
+# PullTasks stream to the coordinator and ask for work (free slots + prefetch).
+DISPATCH_MODE = os.getenv("DISPATCH_MODE", "push").lower()
+PULL_PREFETCH = int(os.getenv("PULL_PREFETCH", "2"))   # default-sized tasks buffered beyond free slots
+PULL_RECONNECT_MAX = 30                               # seconds, reconnect backoff cap
+
+_pulled = set()               # asyncio.Tasks for pulled tasks not finished yet
+_credits = None               # credit queue of the current PullTasks stream
+_reporter = None              # pull mode: results go to the coordinator in batches
+
+RESULT_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", "100"))
+RESULT_FLUSH_INTERVAL = float(os.getenv("RESULT_FLUSH_INTERVAL", "0.05"))   # seconds
+REPORT_RETRY_DELAY = 1.0      # seconds between attempts while the coordinator is unreachable
+REPORT_CLOSE_TIMEOUT = 30.0   # seconds shutdown keeps trying to deliver the last results
+
+# Name reported in heartbeats and pull streams
+HOSTNAME = f"{os.getenv('WORKER_NAME', 'Default-Worker')}-{str(uuid.uuid4())[:6]}"
+
 
 
 # ==============================
@@ -41,61 +78,313 @@ COORDINATOR_GRPC_PORT = int(os.getenv("COORDINATOR_GRPC_PORT", "50052"))
 class WorkerService(task_pb2_grpc.WorkerServiceServicer):
     async def ExecuteTask(self, request, context):
         """Handles incoming task execution requests."""
-        async with SEM:
-            task_id = request.id
-            command = request.command
-            logger.info(f"🧾 Received task {task_id}: {command}")
+        return await self.execute(request, traceparent_from_grpc(context))
+
+    async def ExecuteTasks(self, request, context):
+        """Batched ExecuteTask: run every task, reply once all have finished."""
+        results = await asyncio.gather(
+            *(self.execute(task, task.trace_parent or None) for task in request.tasks)
+        )
+        return task_pb2.ResultBatch(hostname=HOSTNAME, results=results)
+
+    async def execute(self, request, traceparent=None):
+        """Run one task (pushed via ExecuteTask or pulled from a stream)."""
+        global _active
+        _active += 1
+        try:
+            with start_span(
+                "execute_task", parent=traceparent, kind=SERVER,
+                attributes={"task.id": request.id},
+            ) as span:
+                resp = await self._execute(request)
+                span.set_attribute("task.status", resp.status)
+                return resp
+        finally:
+            _active -= 1
+
+    async def _execute(self, request):
+        task_id = request.id
+        if _draining.is_set():
+            return await hand_back(task_id)
+
+        need = (
+            Resources.for_request(request.resources) if request.HasField("resources")
+            else Resources.for_task(None)   # sent without requests: default-sized
+        ).fitted(CAPACITY)
+        try:
+            with start_span("slot_wait"):
+                await POOL.acquire(need)
+        except ResourceNeverFits as e:
+            logger.error("❌ Task %s can't run here: %s", task_id, e, extra={"task_id": task_id})
+            return await self._finish(task_pb2.TaskResponse(id=task_id, status="failed", message=str(e)))
+        try:
+            return await self._run(request, need)
+        finally:
+            POOL.release(need)
+
+    async def _run(self, request, need):
+        task_id = request.id
+        # Queued behind running tasks while the drain started
+        if _draining.is_set():
+            return await hand_back(task_id)
+
+        command = request.command
+        logger.info("🧾 Received task %s: %s", task_id, command, extra={"task_id": task_id})
+
+        started_at = datetime.now(timezone.utc)
+        if _reporter is None:
+            # With a reporter, started_at travels with the result instead
+            with start_span("db.mark_started"), stage_timer("db.mark_started"):
+                await store.mark_started(task_id, started_at)
+
+        shell_command, cleanup = confine(command, need, task_id)
+        try:
+            # Run the command asynchronously
+            with start_span("subprocess") as span:
+                with stage_timer("subprocess.spawn"):
+                    process = await asyncio.create_subprocess_shell(
+                        shell_command,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        # Own process group: signals to the worker don't hit the
+                        # command, and stopping it also stops its children.
+                        start_new_session=True,
+                    )
+                _running[task_id] = process
+                try:
+                    stdout, stderr = await process.communicate()
+                except asyncio.CancelledError:
+                    # Coordinator dropped the call (e.g. it is shutting down):
+                    # don't leave an orphan process or a row stuck in "running".
+                    _kill(process)
+                    await hand_back(task_id)
+                    raise
+                finally:
+                    _running.pop(task_id, None)
+                    cleanup()
+                span.set_attribute("process.exit_code", process.returncode)
+
+            if task_id in _evicted:
+                _evicted.discard(task_id)
+                return await hand_back(task_id)
+
+            if process.returncode == 0:
+                logger.info("✅ Task %s completed successfully.", task_id, extra={"task_id": task_id})
+                status = "done"
+                message = stdout.decode().strip() or "Executed successfully"
+                completed_at = datetime.now(timezone.utc)
+            else:
+                logger.error("❌ Task %s failed: %s", task_id, stderr.decode().strip(), extra={"task_id": task_id})
+                status = "failed"
+                message = stderr.decode().strip()
+                completed_at = datetime.now(timezone.utc)
+
+            return await self._finish(task_pb2.TaskResponse(
+                id=task_id, status=status, message=message,
+                started_at=started_at.timestamp(), completed_at=completed_at.timestamp(),
+            ))
+
+        except Exception as e:
+            logger.error("🔥 Exception while executing task %s: %s", task_id, e, extra={"task_id": task_id})
+            # Goes through the task's retry policy like a failed command
+            return await self._finish(task_pb2.TaskResponse(id=task_id, status="failed", message=str(e)))
+
+    async def _finish(self, result):
+        """Record a final result: batched to the Coordinator in pull mode, else written here."""
+        if _reporter is not None:
+            _reporter.add(result)
+            return result
+
+        # Update DB lifecycle timestamps ("failed" may become "retrying")
+        with start_span("db.record_result"), stage_timer("db.record_result"):
+            applied = await store.record_results([result])
+        result.status = applied.get(result.id, result.status)
+        return result
+
+
+def _kill(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def hand_back(task_id: int):
+    """Return a task to the queue untouched (no retry counted, no backoff)."""
+    result = task_pb2.TaskResponse(id=task_id, status="requeued", message="Worker draining")
+    if _reporter is not None:
+        # Pull mode: the coordinator hands it back (no database access needed here)
+        _reporter.add(result)
+    else:
+        await store.requeue(task_id)
+    logger.info("↩️ Task %s handed back to the queue.", task_id, extra={"task_id": task_id})
+    return result
+
+
+# ==============================
+# 📥 Pull Mode
+# ==============================
+async def pull_tasks(service: WorkerService):
+    """Keep a PullTasks stream open to the Coordinator and run what it sends."""
+    global _credits
+    target = f"{os.getenv('COORDINATOR_HOST')}:{os.getenv('COORDINATOR_HEARTBEAT_PORT')}"
+    backoff = 1.0
+
+    while not _draining.is_set():
+        # Tasks still running from a previous stream keep their slots
+        credits = _credits = asyncio.Queue()
+        credits.put_nowait(SLOTS + PULL_PREFETCH - len(_pulled))
+        # Draining closes our side of the stream: the coordinator stops sending
+        stop = asyncio.create_task(_draining.wait())
+        stop.add_done_callback(lambda _: credits.put_nowait(None))
+        try:
+            async with grpc_options.insecure_channel(target) as channel:
+                stub = task_pb2_grpc.WorkerServiceStub(channel)
+                logger.info(f"📥 Pulling tasks from {target}.")
+                async for batch in stub.PullTasks(_grant_credit(credits)):
+                    backoff = 1.0
+                    for request in batch.tasks:
+                        job = asyncio.create_task(
+                            service.execute(request, request.trace_parent or None)
+                        )
+                        _pulled.add(job)
+                        job.add_done_callback(_pulled_done)
+        except grpc.aio.AioRpcError as e:
+            logger.warning(f"⚠️ Pull stream failed: {e.code().name} {e.details()}")
+        finally:
+            stop.cancel()
+
+        if not _draining.is_set():
+            try:
+                await asyncio.wait_for(_draining.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(PULL_RECONNECT_MAX, backoff * 2)
 
-            async with AsyncSessionLocal() as session:
-                task = await session.get(Task, task_id)
-                if task:
-                    task.started_at = datetime.now(timezone.utc)
-                    await session.commit()
 
+async def _grant_credit(credits: asyncio.Queue):
+    """Request stream: one PullRequest per batch of freed slots; ends on None."""
+    while True:
+        credit = await credits.get()
+        while credit is not None and not credits.empty():
+            more = credits.get_nowait()
+            credit = None if more is None else credit + more
+        if credit is None:
+            return
+        if credit > 0:
+            yield task_pb2.PullRequest(
+                hostname=HOSTNAME, credit=credit, available=_pull_available(),
+                capacity=task_pb2.Resources(**CAPACITY.as_dict()),
+            )
+
+
+def _pull_available():
+    """Resources the coordinator may fill: unclaimed ones plus prefetch headroom."""
+    available = POOL.unclaimed() + Resources(cpu=PULL_PREFETCH * DEFAULT_NEED.cpu)
+    return task_pb2.Resources(
+        cpu=max(0.0, available.cpu), memory_mb=max(0, available.memory_mb),
+        named={k: max(0.0, v) for k, v in available.named.items()},
+    )
+
+
+def _pulled_done(job):
+    _pulled.discard(job)
+    if _credits is not None and not _draining.is_set():
+        _credits.put_nowait(1)
+
+
+def _preload_done(job):
+    if not job.cancelled() and job.exception() is not None:
+        logger.error(f"❌ Preloading the database layer failed: {job.exception()!r}")
+
+
+class ResultReporter:
+    """
+    Pull mode: buffer outcomes (results and hand-backs) and send them to the
+    Coordinator in batches. While it is unreachable they are kept and retried,
+    or written directly when this worker happens to have database settings.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self.pending = []
+        self.closing = False
+        self._wake = asyncio.Event()
+
+    def add(self, result):
+        self.pending.append(result)
+        if len(self.pending) >= RESULT_BATCH_SIZE:
+            self._wake.set()
+
+    async def run(self):
+        async with grpc_options.insecure_channel(self.target) as channel:
+            stub = task_pb2_grpc.WorkerServiceStub(channel)
+            while not self.closing:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), RESULT_FLUSH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                if not await self._flush(stub):
+                    await asyncio.sleep(REPORT_RETRY_DELAY)
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + REPORT_CLOSE_TIMEOUT
+            while not await self._flush(stub) and loop.time() < deadline:
+                await asyncio.sleep(REPORT_RETRY_DELAY)
+            if self.pending:
+                logger.error(f"❌ {len(self.pending)} task outcome(s) could not be reported to the coordinator.")
+
+    async def close(self, job):
+        self.closing = True
+        self._wake.set()
+        await job
+
+    async def _flush(self, stub) -> bool:
+        """Send everything pending; False if the coordinator couldn't take it (kept for later)."""
+        while self.pending:
+            batch = self.pending[:RESULT_BATCH_SIZE]
+            del self.pending[:RESULT_BATCH_SIZE]
             try:
-                # Run the command asynchronously
-                process = await asyncio.create_subprocess_shell(
-                    command,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                stdout, stderr = await process.communicate()
-
-                if process.returncode == 0:
-                    logger.info(f"✅ Task {task_id} completed successfully.")
-                    status = "done"
-                    message = stdout.decode().strip() or "Executed successfully"
-                    completed_at = datetime.now(timezone.utc)
-                else:
-                    logger.error(f"❌ Task {task_id} failed: {stderr.decode().strip()}")
-                    status = "failed"
-                    message = stderr.decode().strip()
-                    completed_at = datetime.now(timezone.utc)
-
-                # Update DB lifecycle timestamps
-                async with AsyncSessionLocal() as session:
-                    task = await session.get(Task, task_id)
-                    if task:
-                        task.status = status
-                        if status == "done":
-                            task.completed_at = completed_at
-                        else:
-                            task.failed_at = completed_at
-                        await session.commit()
-
-                return task_pb2.TaskResponse(id=task_id, status=status, message=message)
-
-            except Exception as e:
-                logger.error(f"🔥 Exception while executing task {task_id}: {e}")
-                async with AsyncSessionLocal() as session:
-                    task = await session.get(Task, task_id)
-                    if task:
-                        task.status = "failed"
-                        task.failed_at = datetime.now(timezone.utc)
-                        await session.commit()
-                return task_pb2.TaskResponse(
-                    id=task_id, status="failed", message=str(e)
-                )
+                with stage_timer("report_results"):
+                    await stub.ReportResults(
+                        task_pb2.ResultBatch(hostname=HOSTNAME, results=batch), timeout=10
+                    )
+            except grpc.aio.AioRpcError as e:
+                if store.DATABASE_CONFIGURED:
+                    # Don't lose outcomes: write them ourselves (late duplicates are ignored)
+                    logger.warning(f"⚠️ ReportResults failed ({e.code().name}); writing {len(batch)} result(s) directly.")
+                    await store.apply_outcomes(batch)
+                    continue
+                self.pending[:0] = batch
+                logger.warning(f"⚠️ ReportResults failed ({e.code().name}); keeping {len(self.pending)} result(s) for a retry.")
+                return False
+        return True
+
+
+# ==============================
+# 🛑 Graceful Drain
+# ==============================
+async def drain():
+    """Stop taking tasks, let running ones finish until the deadline, hand back the rest."""
+    _draining.set()
+    logger.warning(f"🛑 Draining: waiting up to {DRAIN_TIMEOUT}s for {len(_running)} running task(s).")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + DRAIN_TIMEOUT
+    while _running and loop.time() < deadline:
+        await asyncio.sleep(0.2)
+
+    for task_id, process in list(_running.items()):
+        logger.warning("⏹️ Task %s still running at drain deadline; stopping it.", task_id, extra={"task_id": task_id})
+        _evicted.add(task_id)
+        _kill(process)
+
+    # Let the handlers send their final responses before the server goes away
+    grace_deadline = loop.time() + 5
+    while _active and loop.time() < grace_deadline:
+        await asyncio.sleep(0.1)
+    logger.info("✅ Drain complete.")
 
 
 # ==============================
@@ -103,10 +392,7 @@ class WorkerService(task_pb2_grpc.WorkerServiceServicer):
 # ==============================
 async def send_heartbeat():
     """Periodically send heartbeat pings to Coordinator."""
-    # Read settings from .env (with defaults)
-    base_name = os.getenv("WORKER_NAME", "Default-Worker")
-    instance_id = str(uuid.uuid4())[:6]  # short unique suffix
-    hostname = f"{base_name}-{instance_id}"
+    hostname = HOSTNAME
 
     # coordinator_host = os.getenv("COORDINATOR_HOST", "coordinator")
     # coordinator_port = os.getenv("COORDINATOR_HEARTBEAT_PORT", "50052")
@@ -117,16 +403,33 @@ async def send_heartbeat():
 
     interval = int(os.getenv("WORKER_HEARTBEAT_INTERVAL", 10))
 
+    # Where the coordinator can reach this worker's gRPC server (none in pull mode)
+    address = "" if DISPATCH_MODE == "pull" else os.getenv("WORKER_ADVERTISE_ADDRESS") or (
+        f"{os.getenv('WORKER_HOST') or socket.gethostname()}:{os.getenv('WORKER_GRPC_PORT', '50051')}"
+    )
+
     while True:
+        status = "draining" if _draining.is_set() else "alive"
         try:
-            async with grpc.aio.insecure_channel(f"{coordinator_host}:{coordinator_port}") as channel:
+            async with grpc_options.insecure_channel(f"{coordinator_host}:{coordinator_port}") as channel:
                 stub = task_pb2_grpc.WorkerServiceStub(channel)
-                req = task_pb2.HeartbeatRequest(hostname=hostname)
+                req = task_pb2.HeartbeatRequest(
+                    hostname=hostname, status=status, address=address,
+                    capacity=task_pb2.Resources(**CAPACITY.as_dict()),
+                )
                 await stub.Heartbeat(req)
-                logger.info(f"💓 Sent heartbeat from {hostname}")
+                logger.info("💓 Sent heartbeat from %s (%s)", hostname, status)
         except Exception as e:
             logger.warning(f"⚠️ Heartbeat failed: {e}")
-        await asyncio.sleep(interval)
+
+        if _draining.is_set():
+            await asyncio.sleep(interval)
+        else:
+            # Wake early when a drain starts so the coordinator stops routing here now
+            try:
+                await asyncio.wait_for(_draining.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
 
 
 
@@ -134,21 +437,55 @@ async def send_heartbeat():
 # 🚀 Start Worker Services
 # ==============================
 async def serve():
-    """Start Worker gRPC server for task execution."""
-    server = grpc.aio.server()
-    task_pb2_grpc.add_WorkerServiceServicer_to_server(WorkerService(), server)
+    """Start Worker gRPC server (or pull stream) for task execution; drain on SIGTERM/SIGINT."""
+    global _reporter
+    service = WorkerService()
+    server = grpc_options.server()
+    task_pb2_grpc.add_WorkerServiceServicer_to_server(service, server)
 
 
     worker_port = int(os.getenv("WORKER_GRPC_PORT", "50051"))
     server.add_insecure_port(f"[::]:{worker_port}")
 
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    if DISPATCH_MODE == "pull":
+        _reporter = ResultReporter(
+            f"{os.getenv('COORDINATOR_HOST')}:{os.getenv('COORDINATOR_HEARTBEAT_PORT')}"
+        )
+        reporting = asyncio.create_task(_reporter.run())
+        puller = asyncio.create_task(pull_tasks(service))
+        await stop.wait()
+        await drain()
+        await puller
+        await asyncio.gather(*_pulled, return_exceptions=True)
+        await _reporter.close(reporting)
+        return
+
     await server.start()
     logger.info(f"⚙️ Worker service running on port {worker_port}...")
-    await server.wait_for_termination()
+    # Ready: now load the database layer the first task will need, off the loop.
+    # Not awaited: a failed or slow import must not hold up the drain below.
+    preload = asyncio.create_task(asyncio.to_thread(store.preload))
+    preload.add_done_callback(_preload_done)
+    await stop.wait()
+
+    await drain()
+    await server.stop(grace=1)
 
 # ✅ Proper async entrypoint (fix for asyncio.gather issue)
 async def main():
-    await asyncio.gather(serve(), send_heartbeat())
+    heartbeat = asyncio.create_task(send_heartbeat())
+    loop_monitor = asyncio.create_task(monitor_event_loop())
+    try:
+        await serve()
+    finally:
+        heartbeat.cancel()
+        loop_monitor.cancel()
+        await store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+"""
+Worker capacity, slot accounting and per-task resource limits.
+
+Capacity is detected at startup (CPUs this process may use, physical memory,
+both capped by the cgroup the worker runs in) and can be overridden or
+extended with named resources:
+
+    WORKER_RESOURCES=cpu=8,memory_mb=16384,gpu=2,matlab_license=1
+
+Enforcement is opt-in:
+
+    WORKER_CGROUP_ROOT=/sys/fs/cgroup/pytaskflow   delegated cgroup v2 directory;
+                                                   each task gets a child with
+                                                   cpu.max / memory.max set
+    WORKER_RLIMIT_MEMORY=1                         `ulimit -v` the task's memory
+                                                   (no cgroups needed, address space only)
+"""
+import asyncio
+import logging
+import os
+import shlex
+from collections import deque
+
+from scheduler.core.resources import Resources
+
+# Shares the handler configured by worker.main
+logger = logging.getLogger("Worker")
+
+CGROUP_ROOT = os.getenv("WORKER_CGROUP_ROOT")
+RLIMIT_MEMORY = os.getenv("WORKER_RLIMIT_MEMORY", "").lower() in ("1", "true", "yes")
+
+CGROUP_CPU_PERIOD = 100_000   # microseconds
+
+
+class ResourceNeverFits(Exception):
+    """The task asks for more than this worker has in total."""
+
+
+# ======================================
+# Capacity detection
+# ======================================
+def _read(path: str):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _detect_cpu() -> float:
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+    # cgroup v2 quota: "<quota> <period>" or "max <period>"
+    quota, _, period = (_read("/sys/fs/cgroup/cpu.max") or "max").partition(" ")
+    if quota != "max" and period:
+        cpus = min(cpus, int(quota) / int(period))
+    return cpus
+
+
+def _detect_memory_mb() -> int:
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        total = 0
+    limit = _read("/sys/fs/cgroup/memory.max")
+    if limit and limit != "max":
+        total = min(total, int(limit)) if total else int(limit)
+    return total // (1024 * 1024)
+
+
+def detect_capacity() -> Resources:
+    """This worker's total resources: detected, then WORKER_RESOURCES on top."""
+    overrides = {}
+    for item in os.getenv("WORKER_RESOURCES", "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            overrides[key.strip()] = float(value)
+    cpu = overrides.pop("cpu", None) or _detect_cpu()
+    memory_mb = int(overrides.pop("memory_mb", None) or _detect_memory_mb())
+    return Resources(cpu=cpu, memory_mb=memory_mb, named=overrides)
+
+
+# ======================================
+# Slot accounting
+# ======================================
+class ResourcePool:
+    """
+    Hands out resources first come, first served: a large task at the head of
+    the queue is not overtaken by small ones, so it can't be starved.
+    """
+
+    def __init__(self, capacity: Resources):
+        self.capacity = capacity
+        self.in_use = Resources()
+        self._waiters = deque()   # (need, future)
+
+    def free(self) -> Resources:
+        return self.capacity - self.in_use
+
+    def unclaimed(self) -> Resources:
+        """Free resources not already promised to queued tasks."""
+        free = self.free()
+        for need, _ in self._waiters:
+            free = free - need
+        return free
+
+    async def acquire(self, need: Resources):
+        if not need.fits_in(self.capacity):
+            raise ResourceNeverFits(f"needs {need.as_dict()}, worker has {self.capacity.as_dict()}")
+        if not self._waiters and need.fits_in(self.free()):
+            self.in_use = self.in_use + need
+            return
+        waiter = (need, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            if waiter[1].done() and not waiter[1].cancelled():
+                self.release(need)     # granted just as we were cancelled
+            else:
+                self._waiters.remove(waiter)
+                self._grant()
+            raise
+
+    def release(self, need: Resources):
+        self.in_use = self.in_use - need
+        self._grant()
+
+    def _grant(self):
+        while self._waiters and self._waiters[0][0].fits_in(self.free()):
+            need, future = self._waiters.popleft()
+            self.in_use = self.in_use + need
+            future.set_result(None)
+
+
+# ======================================
+# Enforcement
+# ======================================
+def confine(command: str, need: Resources, task_id: int):
+    """
+    Wrap `command` so it runs inside the task's limits.
+    Returns (shell command, cleanup callable).
+
+    The limits are applied by a small shell prefix rather than preexec_fn,
+    which is not safe in a process with gRPC's threads.
+    """
+    prefix = []
+    cgroup = None
+    if CGROUP_ROOT:
+        cgroup = os.path.join(CGROUP_ROOT, f"task-{task_id}")
+        try:
+            os.makedirs(cgroup, exist_ok=True)
+            with open(os.path.join(cgroup, "cpu.max"), "w") as f:
+                f.write(f"{int(need.cpu * CGROUP_CPU_PERIOD)} {CGROUP_CPU_PERIOD}")
+            if need.memory_mb:
+                with open(os.path.join(cgroup, "memory.max"), "w") as f:
+                    f.write(str(need.memory_mb * 1024 * 1024))
+            prefix.append(f"echo $$ > {shlex.quote(os.path.join(cgroup, 'cgroup.procs'))}")
+        except OSError as e:
+            logger.warning(f"⚠️ Could not set up cgroup for Task {task_id}: {e}")
+            _remove_cgroup(cgroup)
+            cgroup = None
+    if RLIMIT_MEMORY and need.memory_mb:
+        prefix.append(f"ulimit -v {need.memory_mb * 1024}")
+
+    if not prefix:
+        return command, lambda: None
+    wrapped = " && ".join(prefix + [f"exec /bin/sh -c {shlex.quote(command)}"])
+    return wrapped, lambda: _remove_cgroup(cgroup)
+
+
+def _remove_cgroup(path):
+    if path is None:
+        return
+    try:
+        os.rmdir(path)
+    except OSError as e:
+        # Still has processes (e.g. a daemonized child); the next run reuses it
+        logger.debug(f"cgroup {path} not removed: {e}")
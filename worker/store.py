@@ -0,0 +1,66 @@
+"""
+The worker's database writes.
+
+SQLAlchemy, the models and the scheduler services are imported on first use
+rather than when the worker starts: they are most of a cold start, and a pull
+mode worker reports every outcome through the coordinator and needs no
+database access at all. In push mode preload() imports them in the background
+once the worker is ready, so the first task doesn't pay for it either.
+"""
+import os
+import sys
+from datetime import datetime
+
+# Pull workers may run without any database settings
+DATABASE_CONFIGURED = bool(os.getenv("DATABASE_URL") or os.getenv("POSTGRES_DB"))
+
+
+def preload():
+    """Import the database layer (run in a thread after startup)."""
+    import scheduler.services.results  # noqa: F401  (pulls in db, models, notify, retry)
+
+
+async def mark_started(task_id: int, started_at: datetime):
+    from scheduler.services.db import AsyncSessionLocal
+    from scheduler.models import Task
+
+    async with AsyncSessionLocal() as session:
+        task = await session.get(Task, task_id)
+        if task:
+            task.started_at = started_at
+            await session.commit()
+
+
+async def record_results(results):
+    from scheduler.services.results import record_results
+    return await record_results(results)
+
+
+async def apply_outcomes(results):
+    """Results plus "requeued" hand-backs, as the coordinator's ReportResults applies them."""
+    for result in results:
+        if result.status == "requeued":
+            await requeue(result.id)
+    return await record_results(results)
+
+
+async def requeue(task_id: int):
+    """Return a running task to the queue untouched (no retry counted, no backoff)."""
+    from scheduler.services.db import AsyncSessionLocal
+    from scheduler.services.notify import publish_task_event
+    from scheduler.models import Task
+
+    async with AsyncSessionLocal() as session:
+        task = await session.get(Task, task_id)
+        if task and task.status == "running":
+            task.status = "scheduled"
+            task.picked_at = None
+            task.started_at = None
+            await publish_task_event(session, task_id, task.status)
+            await session.commit()
+
+
+async def close():
+    if "scheduler.services.db" in sys.modules:
+        from scheduler.services.db import dispose_engine
+        await dispose_engine()